@@ -0,0 +1,46 @@
+# Compare building the specialist tasks of one request with fresh agents vs. reused agents.
+# Run from the repository root: python exploration/bench_agent_reuse.py
+
+import sys
+import time
+import tracemalloc
+
+sys.path.append(".")
+from src.home_work_plan import CrewAIChatbot
+
+REQUESTS = 20
+QUESTION = "Quiero pintar una habitación de 12 m2 en Barcelona"
+
+
+def build_request_tasks(chatbot):
+    chatbot.check_relevance_task(QUESTION)
+    for context_key, task_method in chatbot.task_methods.items():
+        chatbot.get_crew(context_key, task_method(QUESTION))
+    chatbot.presentation_task(QUESTION)
+
+
+def measure(chatbot, reuse):
+    allocated = 0
+    cpu_time = 0
+    tracemalloc.start()
+    for _ in range(REQUESTS):
+        if not reuse:
+            chatbot.agents.clear()
+            chatbot.crews.clear()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        cpu_start = time.process_time()
+        build_request_tasks(chatbot)
+        cpu_time += time.process_time() - cpu_start
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return cpu_time / REQUESTS, allocated / REQUESTS
+
+
+if __name__ == "__main__":
+    chatbot = CrewAIChatbot("./config/credentials.yml")
+    build_request_tasks(chatbot)
+
+    for label, reuse in [("rebuilt per request", False), ("reused", True)]:
+        cpu_time, allocated = measure(chatbot, reuse)
+        print(f"Agents {label}: {cpu_time * 1000:.1f} ms CPU, {allocated / 1024:.0f} KiB peak allocation per request")
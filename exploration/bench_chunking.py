@@ -0,0 +1,70 @@
+# Chunk count, index size and retrieval hit rate of the chunking strategies in src/chunking.py.
+# "character 500/50" is the splitter the first notebook version hard-coded. Run from the repository root:
+#   python exploration/bench_chunking.py             (embeds every strategy's chunks with MODEL_EMBEDDING)
+#   python exploration/bench_chunking.py --no-embed  (chunk counts and sizes only)
+
+import os
+import sys
+import time
+
+import numpy as np
+import yaml
+
+sys.path.append(".")
+from exploration.bench_hybrid_retrieval import K, QUERIES
+from src.knowledge_base import parse_pdf
+
+STRATEGIES = [
+    ("structure", 1000, 200),
+    ("recursive", 1000, 200),
+    ("character", 1000, 200),
+    ("character", 500, 50),
+]
+
+
+def hit_rate(embeddings, chunks):
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    found = 0
+    for query, term in QUERIES:
+        query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        top = np.argsort(-(vectors @ query_vector))[:K]
+        found += any(term in chunks[i].lower() for i in top)
+    return found / len(QUERIES), vectors.shape[1]
+
+
+if __name__ == "__main__":
+    with open("config/ragllm_params.yml", "r") as stream:
+        params = yaml.safe_load(stream)
+    pdf_paths = [
+        os.path.join(params["datapath"], filename)
+        for filename in sorted(os.listdir(params["datapath"])) if filename.endswith(".pdf")
+    ]
+
+    embeddings = None
+    if "--no-embed" not in sys.argv:
+        from src.embedding_client import BatchedEmbeddings
+        with open("config/credentials.yml", "r") as stream:
+            embeddings = BatchedEmbeddings.from_credentials(yaml.safe_load(stream))
+
+    for strategy, chunk_size, chunk_overlap in STRATEGIES:
+        start_time = time.perf_counter()
+        chunks = [
+            chunk
+            for pdf_path in pdf_paths
+            for _, _, texts in parse_pdf(pdf_path, chunk_size, chunk_overlap, strategy=strategy)
+            for chunk in texts
+        ]
+        elapsed = time.perf_counter() - start_time
+        text_kib = sum(len(chunk.encode("utf-8")) for chunk in chunks) / 1024
+        line = (
+            f"{strategy:>9} {chunk_size}/{chunk_overlap}: {len(chunks)} chunks, "
+            f"mean {np.mean([len(chunk) for chunk in chunks]):.0f} chars, text {text_kib:.0f} KiB, split in {elapsed:.1f} s"
+        )
+        if embeddings is not None:
+            recall, dimensions = hit_rate(embeddings, chunks)
+            line += (
+                f", vectors {len(chunks) * dimensions * 4 / 2**20:.1f} MiB float32 / "
+                f"{len(chunks) * dimensions / 2**20:.1f} MiB int8, hit rate@{K} {recall:.2f}"
+            )
+        print(line)
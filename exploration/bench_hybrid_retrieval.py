@@ -0,0 +1,62 @@
+# Recall, latency and prompt tokens of hybrid (FTS5 + vector, reciprocal-rank fusion) vs. pure vector
+# retrieval over the indexed renovation books, with and without the reranking stage.
+# Run from the repository root after `python -m src.knowledge_base`:
+#   python exploration/bench_hybrid_retrieval.py
+
+import sys
+import time
+
+import tiktoken
+import yaml
+
+sys.path.append(".")
+from src.embedding_client import BatchedEmbeddings
+from src.knowledge_base import KnowledgeBase
+
+K = 4
+
+# A query counts as found when one of the top K chunks contains the expected term.
+QUERIES = [
+    ("¿Cómo sello con silicona el plato de ducha?", "silicona"),
+    ("¿Cómo arreglo un grifo que gotea?", "grifo"),
+    ("Cambiar un enchufe de la pared", "enchufe"),
+    ("Quitar el papel pintado", "papel pintado"),
+    ("Reparar una baldosa rota", "baldosa"),
+    ("How do I get planning permission for an extension?", "planning permission"),
+    ("Choosing a builder and getting quotes", "quote"),
+    ("Damp proof course problems", "damp"),
+    ("Budget contingency for a renovation", "contingency"),
+    ("Loft conversion building regulations", "loft"),
+]
+
+
+def evaluate(search, encoding):
+    found = tokens = 0
+    start_time = time.perf_counter()
+    for query, term in QUERIES:
+        documents = search(query)
+        found += any(term in document.page_content.lower() for document in documents)
+        tokens += sum(len(encoding.encode(document.page_content)) for document in documents)
+    return found / len(QUERIES), (time.perf_counter() - start_time) / len(QUERIES), tokens / len(QUERIES)
+
+
+if __name__ == "__main__":
+    with open("config/credentials.yml", "r") as stream:
+        credentials = yaml.safe_load(stream)
+    knowledge_base = KnowledgeBase(BatchedEmbeddings.from_credentials(credentials))
+
+    encoding = tiktoken.encoding_for_model("gpt-4")
+
+    strategies = {
+        "vector": lambda query: knowledge_base.vectorstore.similarity_search(query, k=K),
+        "hybrid": lambda query: knowledge_base.hybrid_search(query, k=K, rerank=False),
+        "hybrid+rerank": lambda query: knowledge_base.hybrid_search(query, k=K),
+    }
+    for name, search in strategies.items():
+        recall, latency, tokens = evaluate(search, encoding)
+        print(f"{name:>13}: recall@{K} {recall:.2f}, {latency * 1000:.0f} ms per query, {tokens:.0f} prompt tokens per query")
+
+    start_time = time.perf_counter()
+    for query, _ in QUERIES:
+        knowledge_base.lexical_search(query)
+    print(f"FTS5 query alone: {(time.perf_counter() - start_time) / len(QUERIES) * 1000:.2f} ms per query")
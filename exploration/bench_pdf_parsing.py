@@ -0,0 +1,41 @@
+# Pages per second when parsing and chunking the PDFs in data/ with different numbers of worker processes.
+# Run from the repository root: python exploration/bench_pdf_parsing.py
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+sys.path.append(".")
+from src.knowledge_base import parse_pdf
+
+
+if __name__ == "__main__":
+    with open("config/ragllm_params.yml", "r") as stream:
+        params = yaml.safe_load(stream)
+    strategy = params.get("chunking_strategy", "structure")
+    pdf_paths = [
+        os.path.join(params["datapath"], filename)
+        for filename in sorted(os.listdir(params["datapath"])) if filename.endswith(".pdf")
+    ]
+
+    worker_counts = [None] + [n for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)]
+    for workers in worker_counts:
+        start_time = time.perf_counter()
+        pages = chunks = 0
+        if workers is None:
+            for pdf_path in pdf_paths:
+                parsed = parse_pdf(pdf_path, params["chunk_size"], params["chunk_overlap"], strategy=strategy)
+                pages += len(parsed)
+                chunks += sum(len(texts) for _, _, texts in parsed)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for pdf_path in pdf_paths:
+                    parsed = parse_pdf(pdf_path, params["chunk_size"], params["chunk_overlap"], executor, strategy=strategy)
+                    pages += len(parsed)
+                    chunks += sum(len(texts) for _, _, texts in parsed)
+        elapsed = time.perf_counter() - start_time
+        label = "serial" if workers is None else f"{workers} workers"
+        print(f"{label:>10}: {pages} pages, {chunks} chunks in {elapsed:.2f} s ({pages / elapsed:.1f} pages/s)")
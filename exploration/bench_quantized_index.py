@@ -0,0 +1,75 @@
+# Resident memory per worker and query latency of the mmap int8 QuantizedIndex vs. a flat float32 index.
+# Uses random vectors, so it runs without credentials. Run from the repository root:
+#   python exploration/bench_quantized_index.py [vectors] [dimensions] [workers]
+
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.append(".")
+from src.quantized_index import QuantizedIndex
+
+QUERIES = 50
+K = 10
+
+
+def memory_kib():
+    # Rss counts every mapped page; Pss splits shared pages between the processes mapping them.
+    values = {}
+    with open("/proc/self/smaps_rollup", "r") as stream:
+        for line in stream:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def run_worker(args):
+    kind, path, queries = args
+    if kind == "flat":
+        vectors = np.load(os.path.join(path, "flat.npy"))
+        search = lambda query: np.argsort(-(vectors @ query))[:K]
+    else:
+        index = QuantizedIndex(path)
+        search = lambda query: [chunk_id for chunk_id, _ in index.search(query, K)]
+    start_time = time.perf_counter()
+    results = [list(search(query)) for query in queries]
+    latency = (time.perf_counter() - start_time) / len(queries)
+    return memory_kib(), latency, results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(count, QUERIES)] + 0.05 * rng.standard_normal((QUERIES, dimensions), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as path:
+        np.save(os.path.join(path, "flat.npy"), vectors)
+        QuantizedIndex.build(range(count), vectors, path)
+        del vectors
+        print(f"{count} vectors x {dimensions} dims, {workers} worker processes")
+        print(f"Files: flat float32 {os.path.getsize(os.path.join(path, 'flat.npy')) / 2**20:.0f} MiB, "
+              f"int8 {os.path.getsize(os.path.join(path, QuantizedIndex.CODES_FILE)) / 2**20:.0f} MiB")
+
+        reference = None
+        for kind in ("flat", "int8 mmap"):
+            with Pool(workers) as pool:
+                results = pool.map(run_worker, [(kind, path, queries)] * workers)
+            rss = np.mean([memory[0] for memory, _, _ in results]) / 1024
+            pss = np.mean([memory[1] for memory, _, _ in results]) / 1024
+            latency = np.mean([latency for _, latency, _ in results]) * 1000
+            neighbours = results[0][2]
+            if reference is None:
+                reference = neighbours
+            recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(neighbours, reference)])
+            print(f"{kind:>10}: RSS {rss:.0f} MiB, PSS {pss:.0f} MiB per worker, "
+                  f"{latency:.1f} ms per query, recall@{K} vs flat {recall:.2f}")
@@ -0,0 +1,79 @@
+# Precision, coverage and latency of the keyword relevance pre-classifier on a labelled query set.
+# Run from the repository root: python exploration/bench_relevance_classifier.py
+
+import sys
+import time
+
+sys.path.append(".")
+from src.relevance_classifier import AMBIGUOUS, NOT_RELATED, RELATED, RelevancePreClassifier
+
+# Expected outcome of the relevance agent: 'not_related', 'complete' (RELATED) or 'incomplete' (QUESTION)
+LABELLED_QUERIES = [
+    ("¿Cuál es la capital de Francia?", "not_related"),
+    ("Dame una receta de paella", "not_related"),
+    ("¿Quién ganó el partido de fútbol ayer?", "not_related"),
+    ("Recomiéndame una película de terror", "not_related"),
+    ("Escribe un poema sobre el mar", "not_related"),
+    ("¿Qué tiempo hará mañana en Madrid?", "not_related"),
+    ("What's the price of bitcoin today?", "not_related"),
+    ("Write a Python function to sort a list", "not_related"),
+    ("Tell me a joke", "not_related"),
+    ("Who is the president of the United States?", "not_related"),
+    ("Hola", "incomplete"),
+    ("Hello, can you help me?", "incomplete"),
+    ("Quiero pintar una habitación", "incomplete"),
+    ("Quiero reformar el baño", "incomplete"),
+    ("Tengo una gotera en el techo", "incomplete"),
+    ("I want to paint my bedroom", "incomplete"),
+    ("How do I fix a leaking faucet?", "incomplete"),
+    ("Quiero cambiar el suelo del salón por parquet", "incomplete"),
+    ("Necesito instalar un enchufe nuevo en la cocina", "incomplete"),
+    ("Quiero alicatar la cocina, son 8 m2", "incomplete"),
+    ("¿Cuánto tiempo se tarda en pintar una pared?", "incomplete"),
+    ("Quiero pintar una habitación de 12 m2 en Barcelona", "complete"),
+    ("Quiero pintar las paredes del salón, 30 m2, presupuesto 300 €", "complete"),
+    ("Reformar el baño de 5 m2 en Valencia con un presupuesto de 4000 euros", "complete"),
+    ("I want to paint a 12 m2 bedroom in London, budget 200 £", "complete"),
+    ("Cambiar el suelo de una habitación de 15 m2 por tarima laminada en Madrid", "complete"),
+    ("Install drywall on a 10 m wall in Seattle", "complete"),
+    ("Quiero poner silicona en la bañera, mide 1,7 m, vivo en Sevilla", "complete"),
+    # Words that are also off-topic vocabulary ("tiempo", "programa", "historia")
+    ("¿Cuánto tiempo tarda en secar la masilla?", "incomplete"),
+    ("Quiero programar el termostato", "incomplete"),
+    ("¿Cuánto tiempo necesito para pintar 20 m2 de pared en Bilbao?", "complete"),
+    ("Mi casa tiene mucha historia, quiero restaurar las puertas de madera", "incomplete"),
+    ("Write a song about the football match and a poem for the president", "not_related"),
+    ("Dame una receta de cocina y recomiéndame una película", "not_related"),
+    # Generic repair verbs, a measurement and a location, but no home-improvement project
+    ("Quiero cambiar la rueda de la bici y repararla, 2 m de cable, en Madrid", "not_related"),
+    ("Tengo que arreglar el coche, 3 m de manguera, en Valencia", "not_related"),
+    ("Fix my bike chain, about 2 m long, I live in London", "not_related"),
+    ("Quiero instalar una antena parabólica en el coche de 1 m en Bilbao, presupuesto 100 €", "not_related"),
+    ("Replace the strings of my guitar, 1 m each, budget 20 $", "not_related"),
+]
+
+
+def precision(results, label, expected):
+    decided = [truth for predicted, truth in results if predicted == label]
+    return sum(truth == expected for truth in decided) / len(decided) if decided else float("nan"), len(decided)
+
+
+if __name__ == "__main__":
+    classifier = RelevancePreClassifier()
+    results = []
+    start = time.perf_counter()
+    for _ in range(100):
+        results = [(classifier.classify(query), truth) for query, truth in LABELLED_QUERIES]
+    latency = (time.perf_counter() - start) / (100 * len(LABELLED_QUERIES))
+
+    not_related_precision, not_related_count = precision(results, NOT_RELATED, "not_related")
+    related_precision, related_count = precision(results, RELATED, "complete")
+    ambiguous = sum(predicted == AMBIGUOUS for predicted, _ in results)
+
+    print(f"Queries: {len(results)}")
+    print(f"NOT RELATED decided locally: {not_related_count}, precision {not_related_precision:.2f}")
+    print(f"RELATED decided locally: {related_count}, precision {related_precision:.2f}")
+    print(f"Sent to the relevance agent: {ambiguous} ({ambiguous / len(results):.0%})")
+    print(f"Mean latency: {latency * 1e6:.1f} µs per query")
+    for (query, truth), (predicted, _) in zip(LABELLED_QUERIES, results):
+        print(f"  {predicted:12} {truth:12} {query}")
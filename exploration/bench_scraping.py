@@ -0,0 +1,47 @@
+# Time to load every catalog site of data/sites/cost&contractors.yaml one after another vs. concurrently
+# in the shared BrowserPool (the warm-up launch is excluded). Run from the repository root:
+#   python exploration/bench_scraping.py
+
+import sys
+import time
+
+import yaml
+
+sys.path.append(".")
+from src.browser_pool import BrowserPool
+
+SELECTORS = {"Stores": ".product-title", "Contractors": ".contact-info"}
+
+
+def load(link, selector):
+    async def visit(page):
+        start_time = time.perf_counter()
+        await page.goto(link, wait_until="domcontentloaded")
+        try:
+            await page.wait_for_selector(selector, timeout=8000)
+        except Exception:
+            pass
+        return time.perf_counter() - start_time
+    return visit
+
+
+if __name__ == "__main__":
+    with open("data/sites/cost&contractors.yaml", "r") as stream:
+        sites = yaml.safe_load(stream)
+    pool = BrowserPool(size=2, max_pages=6)
+    pool.run(load("about:blank", "body"))
+
+    for section, selector in SELECTORS.items():
+        links = [site["link"] for site in sites.get(section, [])]
+        sequential = [pool.run(load(link, selector)) for link in links]
+
+        start_time = time.perf_counter()
+        futures = [pool.submit(load(link, selector)) for link in links]
+        [future.result() for future in futures]
+        concurrent = time.perf_counter() - start_time
+        print(
+            f"{section}: {len(links)} sites, sequential {sum(sequential):.2f} s, "
+            f"slowest page {max(sequential):.2f} s, concurrent {concurrent:.2f} s"
+        )
+    print(f"Pool: {pool.stats}")
+    pool.close()
@@ -0,0 +1,142 @@
+# Prompt tokens spent on the specialists' answers as markdown vs. as the compact JSON of src/specialist_outputs.py,
+# for a sample bathroom-painting project. Counts what the presentation prompt pastes for each section, plus the
+# output-format instructions each specialist receives. Run from the repository root:
+#   python exploration/bench_structured_outputs.py
+# tiktoken downloads the cl100k_base encoding on first use; offline, point TIKTOKEN_CACHE_DIR at a directory
+# that already holds it (e.g. one filled by a previous online run):
+#   TIKTOKEN_CACHE_DIR=/path/to/tiktoken_cache python exploration/bench_structured_outputs.py
+
+import sys
+import time
+
+import tiktoken
+
+sys.path.append(".")
+from src.specialist_outputs import SCHEMAS, parse_output, prompt_value, render_section, schema_instructions
+
+STRUCTURED = {
+    'materials': {"items": [
+        {"name": "Pintura plástica antimoho blanca", "quantity": 8, "unit": "l", "notes": "dos manos"},
+        {"name": "Imprimación selladora", "quantity": 4, "unit": "l"},
+        {"name": "Masilla para paredes", "quantity": 1, "unit": "kg"},
+        {"name": "Cinta de carrocero", "quantity": 3, "unit": "ud"},
+        {"name": "Plástico protector", "quantity": 10, "unit": "m²"}
+    ]},
+    'tools': {"tools": [
+        {"name": "Rodillo antigota", "quantity": 2, "alternative": "Rodillo de pelo corto"},
+        {"name": "Brocha de 50 mm", "quantity": 1, "alternative": "Paletina"},
+        {"name": "Espátula", "quantity": 1},
+        {"name": "Lija de grano 120", "quantity": 4, "alternative": "Taco de lija"},
+        {"name": "Bandeja de pintura", "quantity": 1}
+    ]},
+    'contractors': {"contractors": [
+        {"name": "Handyman In Barcelona", "contact": "+34 600 123 456", "website": "https://handymaninbarcelona.com/",
+         "budget_request": "Formulario de presupuesto en la web"},
+        {"name": "ViviendaSana", "website": "https://www.houzz.com/professionals/general-contractor/spain-probr0-bo~t_11786~r_2510769",
+         "budget_request": "Mensaje a través de Houzz"}
+    ]},
+    'schedule': {
+        "tasks": [
+            {"task": "Comprar materiales", "duration": "1 día", "people": 1},
+            {"task": "Preparar y proteger el baño", "duration": "2 horas", "people": 1},
+            {"task": "Reparar y lijar las paredes", "duration": "1 día", "people": 1},
+            {"task": "Imprimación", "duration": "1 día", "people": 1},
+            {"task": "Pintura (dos manos)", "duration": "2 días", "people": 2}
+        ],
+        "guide": [
+            {"phase": "Preparación", "steps": ["Retirar accesorios", "Proteger sanitarios y suelo", "Ventilar el baño"]},
+            {"phase": "Ejecución", "steps": ["Rellenar grietas con masilla", "Lijar", "Aplicar la imprimación",
+                                             "Aplicar dos manos de pintura con 4 horas entre manos"]},
+            {"phase": "Final", "steps": ["Retirar la cinta con la pintura aún fresca", "Limpiar herramientas"]}
+        ]
+    },
+    'safety_guidance': {
+        "steps": [
+            {"step": "Lijado", "risks": ["Polvo", "Irritación ocular"], "precautions": ["Mascarilla FFP2", "Gafas de protección"]},
+            {"step": "Aplicación de imprimación y pintura", "risks": ["Vapores"],
+             "precautions": ["Ventilar el baño", "Guantes de nitrilo"]},
+            {"step": "Trabajos en altura", "risks": ["Caídas"], "precautions": ["Escalera estable de tijera"]}
+        ],
+        "extra_caution": ["Desconectar la electricidad cerca de enchufes y focos"]
+    }
+}
+
+# The same content in the markdown layout the tasks' expected outputs ask for
+MARKDOWN = {
+    'materials': (
+        "- **Material 1**: Pintura plástica antimoho blanca\n  - Quantity: 8 litros (dos manos)\n"
+        "- **Material 2**: Imprimación selladora\n  - Quantity: 4 litros\n"
+        "- **Material 3**: Masilla para paredes\n  - Quantity: 1 kg\n"
+        "- **Material 4**: Cinta de carrocero\n  - Quantity: 3 rollos\n"
+        "- **Material 5**: Plástico protector\n  - Quantity: 10 m²\n"
+    ),
+    'tools': (
+        "- **Tool 1**: Rodillo antigota (2 unidades)\n  - Alternative: Rodillo de pelo corto\n"
+        "- **Tool 2**: Brocha de 50 mm\n  - Alternative: Paletina\n"
+        "- **Tool 3**: Espátula\n"
+        "- **Tool 4**: Lija de grano 120 (4 pliegos)\n  - Alternative: Taco de lija\n"
+        "- **Tool 5**: Bandeja de pintura\n"
+    ),
+    'contractors': (
+        "- **Contractor 1**: Handyman In Barcelona\n  - Contact: +34 600 123 456\n"
+        "  - Website: [handymaninbarcelona.com](https://handymaninbarcelona.com/)\n"
+        "  - Budget: Formulario de presupuesto en la web\n"
+        "- **Contractor 2**: ViviendaSana\n"
+        "  - Website: [Houzz](https://www.houzz.com/professionals/general-contractor/spain-probr0-bo~t_11786~r_2510769)\n"
+        "  - Budget: Mensaje a través de Houzz\n"
+    ),
+    'schedule': (
+        "## Schedule\n"
+        "| Task                        | Duration | Recommended People |\n"
+        "|-----------------------------|----------|--------------------|\n"
+        "| Comprar materiales          | 1 día    | 1                  |\n"
+        "| Preparar y proteger el baño | 2 horas  | 1                  |\n"
+        "| Reparar y lijar las paredes | 1 día    | 1                  |\n"
+        "| Imprimación                 | 1 día    | 1                  |\n"
+        "| Pintura (dos manos)         | 2 días   | 2                  |\n"
+        "## Step-by-Step Guide\n"
+        "1. Preparation Phase:\n   - Retirar accesorios\n   - Proteger sanitarios y suelo\n   - Ventilar el baño\n"
+        "2. Execution Phase:\n   - Rellenar grietas con masilla\n   - Lijar\n   - Aplicar la imprimación\n"
+        "   - Aplicar dos manos de pintura con 4 horas entre manos\n"
+        "3. Final Phase:\n   - Retirar la cinta con la pintura aún fresca\n   - Limpiar herramientas\n"
+    ),
+    'safety_guidance': (
+        "**Guía de seguridad paso a paso**\n\n"
+        "1. **Lijado**\n   - *Riesgos*: polvo e irritación ocular.\n"
+        "   - *Medidas de protección*: usa mascarilla FFP2 y gafas de protección.\n"
+        "2. **Aplicación de imprimación y pintura**\n   - *Riesgos*: vapores.\n"
+        "   - *Medidas de protección*: ventila el baño y usa guantes de nitrilo.\n"
+        "3. **Trabajos en altura**\n   - *Riesgos*: caídas.\n"
+        "   - *Medidas de protección*: usa una escalera de tijera estable.\n\n"
+        "**Áreas de especial precaución**: desconecta la electricidad cerca de enchufes y focos.\n"
+    )
+}
+
+
+if __name__ == "__main__":
+    encoding = tiktoken.encoding_for_model("gpt-4")
+    tokens = lambda text: len(encoding.encode(text))
+
+    totals = {"markdown": 0, "json": 0, "instructions": 0}
+    print(f"{'section':>16} | markdown | json | json format instructions")
+    for context_key in SCHEMAS:
+        structured = parse_output(context_key, prompt_value(STRUCTURED[context_key]))
+        assert structured is not None, context_key
+        markdown_tokens = tokens(MARKDOWN[context_key])
+        json_tokens = tokens(prompt_value(structured))
+        instruction_tokens = tokens(schema_instructions(context_key))
+        totals["markdown"] += markdown_tokens
+        totals["json"] += json_tokens
+        totals["instructions"] += instruction_tokens
+        print(f"{context_key:>16} | {markdown_tokens:>8} | {json_tokens:>4} | {instruction_tokens:>4}")
+    saved = totals["markdown"] - totals["json"]
+    print(
+        f"{'total':>16} | {totals['markdown']:>8} | {totals['json']:>4} | {totals['instructions']:>4}  "
+        f"({saved} tokens, {saved / totals['markdown']:.0%} fewer in the presentation prompt)"
+    )
+
+    start_time = time.perf_counter()
+    for _ in range(100):
+        for context_key in SCHEMAS:
+            render_section(context_key, STRUCTURED[context_key], 'es')
+    print(f"Deterministic rendering of all sections: {(time.perf_counter() - start_time) * 10:.2f} ms")
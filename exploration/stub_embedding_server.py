@@ -0,0 +1,73 @@
+# Local stand-in for the Azure embeddings endpoint, to exercise src/embedding_client.py without an API key.
+# It answers POST /openai/deployments/<deployment>/embeddings with deterministic vectors and rejects a
+# share of the requests with 429 + Retry-After, like a deployment over its rate limit.
+#
+#   python exploration/stub_embedding_server.py --port 8765 --rate-limit 0.2
+#
+#   from src.embedding_client import BatchedEmbeddings
+#   embeddings = BatchedEmbeddings.from_credentials({
+#       "AZURE_API_KEY": "stub", "AZURE_ENDPOINT": "http://localhost:8765",
+#       "AZURE_API_VERSION": "2023-07-01-preview", "MODEL_EMBEDDING": "text-embedding-ada-002"})
+#   embeddings.embed_documents(["pintar una pared"] * 100); print(embeddings.stats)
+
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_vector(text, dimensions):
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(seed[i % len(seed)] - 128) / 128 for i in range(dimensions)]
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if random.random() < self.server.rate_limit:
+            self.reply(429, {"error": {"code": "429", "message": "Rate limit is exceeded."}}, {"Retry-After": "1"})
+            return
+
+        time.sleep(self.server.latency)
+        inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        self.reply(200, {
+            "object": "list",
+            "model": "stub",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": stub_vector(str(text), self.server.dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        })
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Azure OpenAI embeddings server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate-limit", type=float, default=0.2, help="share of requests answered with 429")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per successful request")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("localhost", args.port), StubEmbeddingHandler)
+    server.rate_limit = args.rate_limit
+    server.latency = args.latency
+    server.dimensions = args.dimensions
+    print(f"Stub embedding server on http://localhost:{args.port}")
+    server.serve_forever()
@@ -23,6 +23,17 @@ st.image(logo_image, caption='')
 
 st.title("Asistente de Mejoras del Hogar")
 
+# Títulos de las secciones que se muestran a medida que termina cada agente
+section_titles = {
+    "schedule": "Planificación y guía paso a paso",
+    "materials": "Materiales",
+    "tools": "Herramientas",
+    "cost_estimation": "Estimación de costes",
+    "contractors": "Profesionales",
+    "safety_guidance": "Seguridad",
+}
+present = st.sidebar.checkbox("Redactar la respuesta final con IA", value=True)
+
 # Inicializar historial de chat
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -40,11 +51,27 @@ if prompt := st.chat_input("¿Qué construimos hoy?"):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Obtener respuesta de CrewAI
+    # Obtener respuesta de CrewAI, mostrando cada sección en cuanto está lista
     with st.chat_message("assistant"):
-        with st.spinner("Pensando..."):
-            response = st.session_state.crewai_chatbot.get_response(prompt)
-            st.markdown(response)
+        status = st.empty()
+        status.markdown("_Pensando..._")
+        placeholders = {key: st.empty() for key in section_titles}
+        answer = st.empty()
+        tokens = []
+        response = ""
+        for event in st.session_state.crewai_chatbot.stream_events(prompt, present=present):
+            if event["type"] == "section":
+                placeholders[event["key"]].container().expander(section_titles[event["key"]]).markdown(event["content"])
+            elif event["type"] == "token":
+                status.empty()
+                tokens.append(event["content"])
+                answer.markdown("".join(tokens))
+            else:
+                status.empty()
+                for placeholder in placeholders.values():
+                    placeholder.empty()
+                response = event["content"]
+                answer.markdown(response)
     
     # Añadir respuesta del asistente al historial
     st.session_state.messages.append({"role": "assistant", "content": response})
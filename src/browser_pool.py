@@ -0,0 +1,119 @@
+from playwright.async_api import async_playwright
+
+import asyncio
+import atexit
+import threading
+
+
+class BrowserPool:
+    """Warm headless Chromium browsers shared by every scrape in the process.
+
+    Playwright's async API runs on one event loop in a background thread,
+    which owns the browsers, one reusable context per browser (cookie banners
+    accepted once stay accepted) and every page. ``submit`` schedules an async
+    function of a fresh page from any thread and returns a
+    ``concurrent.futures.Future``; ``run`` waits for it. Up to ``size``
+    browsers are launched on demand, relaunched if they crash, and at most
+    ``max_pages`` pages are open at once.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, size=2, max_pages=6, page_timeout=15000, launch_options=None, context_options=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.launch_options = launch_options or {"headless": True}
+        self.context_options = context_options or {}
+        self.loop = None
+        self.thread = None
+        self.playwright = None
+        self.browsers = [None] * size
+        self.open_pages = [0] * size
+        self.lock = threading.Lock()
+        self.stats = {"launches": 0, "jobs": 0}
+
+    @classmethod
+    def shared(cls, size=2, max_pages=6):
+        # One pool per process, so every chatbot session reuses the same browsers.
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(size=size, max_pages=max_pages)
+                atexit.register(cls._shared.close)
+            return cls._shared
+
+    def start(self):
+        with self.lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="browser-pool", daemon=True)
+            self.thread.start()
+            asyncio.run_coroutine_threadsafe(self.astart(), self.loop).result()
+
+    async def astart(self):
+        self.playwright = await async_playwright().start()
+        self.semaphore = asyncio.Semaphore(self.max_pages)
+        self.launch_locks = [asyncio.Lock() for _ in range(self.size)]
+
+    async def context(self):
+        # The least busy running browser is used. When every running browser has pages open, one more is
+        # launched, but pages that arrive during that launch keep using the running browsers.
+        running = [i for i, entry in enumerate(self.browsers) if entry is not None and entry[0].is_connected()]
+        launching = any(lock.locked() for lock in self.launch_locks)
+        index = min(running, key=lambda i: self.open_pages[i], default=None)
+        if index is None or (self.open_pages[index] > 0 and len(running) < self.size and not launching):
+            index = next(i for i in range(self.size) if i not in running)
+            async with self.launch_locks[index]:
+                if self.browsers[index] is None or not self.browsers[index][0].is_connected():
+                    browser = await self.playwright.chromium.launch(**self.launch_options)
+                    context = await browser.new_context(**self.context_options)
+                    context.set_default_timeout(self.page_timeout)
+                    self.browsers[index] = (browser, context)
+                    self.stats["launches"] += 1
+        return index, self.browsers[index][1]
+
+    async def run_page(self, function):
+        async with self.semaphore:
+            index, context = await self.context()
+            self.open_pages[index] += 1
+            page = None
+            try:
+                page = await context.new_page()
+                return await function(page)
+            finally:
+                self.open_pages[index] -= 1
+                try:
+                    if page is not None:
+                        await page.close()
+                except Exception:
+                    pass
+
+    def submit(self, function):
+        self.start()
+        with self.lock:
+            self.stats["jobs"] += 1
+        return asyncio.run_coroutine_threadsafe(self.run_page(function), self.loop)
+
+    def run(self, function, timeout=None):
+        return self.submit(function).result(timeout=timeout)
+
+    async def aclose(self):
+        for entry in self.browsers:
+            if entry is not None:
+                await entry[1].close()
+                await entry[0].close()
+        self.browsers = [None] * self.size
+        await self.playwright.stop()
+
+    def close(self):
+        with self.lock:
+            loop, self.loop = self.loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=10)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            self.thread.join(timeout=10)
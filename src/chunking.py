@@ -0,0 +1,145 @@
+from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
+
+import re
+
+
+STRATEGIES = ("structure", "recursive", "character")
+# Stored with the chunking settings in the manifest; bump it when the splitters' output changes, to re-chunk the books
+VERSION = 2
+
+BULLET = re.compile(r"^(?:[■•●▪◦*–-]|\d{1,2}[.)]|[a-z][.)])\s+")
+TABLE_CAPTION = re.compile(r"^(?:table|tabla|taula|cuadro|figure|figura)\s+\d+(?:[-.]\d+)*\b", re.IGNORECASE)
+CHAPTER = re.compile(r"^(?:chapter|cap[ií]tulo|cap[ií]tol)\s+\w+", re.IGNORECASE)
+# Running headers/footers such as "repairs and maintenance—51" (lowercase words only) or
+# "Renno Planner pages 4/5/05 2:13 PM Page 51". Prices and ranges like "PVC pipe 3 m $60–70" are kept.
+PAGE_FURNITURE = re.compile(r"^(?:[a-z][a-z\s,’'&]*[—–]\s?\d{1,4}|.*\d{1,2}:\d{2}\s*[AP]M\s+Page\s+\d{1,4})$")
+PAGE_NUMBER = re.compile(r"^\d{1,4}$")
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def is_heading(line):
+    if len(line) > 70 or line.endswith((".", ",", ";", ":")) or BULLET.match(line):
+        return False
+    letters = [c for c in line if c.isalpha()]
+    return CHAPTER.match(line) is not None or (len(letters) >= 4 and all(c.isupper() for c in letters))
+
+def is_table_line(line):
+    return len(line) <= 50 and not line.endswith((".", ",", ";")) and not BULLET.match(line)
+
+def structure_blocks(text):
+    """Splits the extracted text of a page into ``(kind, text)`` blocks.
+
+    ``kind`` is "heading", "table" (a caption or a run of at least three short
+    cell-like lines), "item" (a list entry) or "text" (a paragraph). PDF line
+    wraps inside items and paragraphs are joined again.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line and not PAGE_FURNITURE.match(line)]
+    # Bare numbers are page numbers only at the top or bottom of the page; elsewhere they are table cells
+    if lines and PAGE_NUMBER.match(lines[-1]):
+        lines.pop()
+    if lines and PAGE_NUMBER.match(lines[0]):
+        lines.pop(0)
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if TABLE_CAPTION.match(line) or (len(lines[i:i + 3]) == 3 and all(is_table_line(l) for l in lines[i:i + 3])):
+            j = i + 1
+            while j < len(lines) and is_table_line(lines[j]) and not is_heading(lines[j]):
+                j += 1
+            blocks.append(("table", "\n".join(lines[i:j])))
+            i = j
+            continue
+        if is_heading(line):
+            blocks.append(("heading", line))
+            i += 1
+            continue
+
+        kind = "item" if BULLET.match(line) else "text"
+        block = line
+        i += 1
+        while i < len(lines) and not (BULLET.match(lines[i]) or is_heading(lines[i]) or TABLE_CAPTION.match(lines[i])):
+            # Words hyphenated across a line break are joined back
+            if block.endswith("-") and lines[i][:1].islower():
+                block = block[:-1] + lines[i]
+            else:
+                block = f"{block} {lines[i]}"
+            i += 1
+        blocks.append((kind, block))
+    return blocks
+
+
+class StructureAwareSplitter:
+    """Packs the structural blocks of a page into chunks of at most ``chunk_size`` characters.
+
+    A heading closes the current chunk and is repeated at the top of every
+    chunk of its section. List items and tables are only cut when they alone
+    exceed the chunk size, paragraphs that do are split by sentence. The last
+    pieces of a full chunk, up to ``chunk_overlap`` characters, start the next.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=200):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size // 2, chunk_overlap=0)
+
+    def pieces(self, kind, block, budget):
+        # Yields (text, continues_previous_piece); only blocks larger than the budget are cut.
+        if len(block) <= budget:
+            yield block, False
+            return
+        sentences = block.split("\n") if kind == "table" else SENTENCE_END.split(block)
+        first = True
+        for sentence in sentences:
+            for piece in [sentence] if len(sentence) <= budget // 2 else self.fallback.split_text(sentence):
+                yield piece, not first and kind != "table"
+                first = False
+
+    def split_text(self, text):
+        chunks = []
+        heading = ""
+        current = []
+
+        def length(pieces):
+            return sum(len(piece) + 1 for piece, _ in pieces)
+
+        def flush(keep_overlap):
+            nonlocal current
+            if current:
+                body = "".join((" " if continues else "\n") + piece for piece, continues in current)[1:]
+                chunks.append(f"{heading}\n{body}" if heading else body)
+            carried = []
+            if keep_overlap:
+                for piece in reversed(current):
+                    if length(carried) + len(piece[0]) > self.chunk_overlap:
+                        break
+                    carried.insert(0, piece)
+            current = carried
+
+        for kind, block in structure_blocks(text):
+            if kind == "heading":
+                flush(keep_overlap=False)
+                heading = block
+                continue
+            budget = self.chunk_size - (len(heading) + 1 if heading else 0)
+            for piece in self.pieces(kind, block, budget):
+                if current and length(current) + len(piece[0]) > budget:
+                    flush(keep_overlap=True)
+                    # The carried overlap is dropped when it would not leave room for the new piece
+                    if length(current) + len(piece[0]) > budget:
+                        current = []
+                current.append(piece)
+        flush(keep_overlap=False)
+        return chunks
+
+
+def make_splitter(strategy, chunk_size, chunk_overlap):
+    # One entry point for every chunking strategy, selected by ``chunking_strategy`` in ragllm_params.yml.
+    if strategy == "structure":
+        return StructureAwareSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if strategy == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if strategy == "character":
+        return CharacterTextSplitter(separator="\n", chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    raise ValueError(f"Unknown chunking strategy {strategy!r}, expected one of {', '.join(STRATEGIES)}")
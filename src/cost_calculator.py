@@ -0,0 +1,160 @@
+import math
+import re
+
+import numpy as np
+
+from src.price_index import parse_number, title_matches
+
+
+# Base units the quantities and prices are compared in, and the factor from each alias to its base unit.
+UNITS = {
+    'kg': ('kg', 1), 'kilo': ('kg', 1), 'kilos': ('kg', 1), 'kilogramo': ('kg', 1), 'kilogramos': ('kg', 1),
+    'kilogram': ('kg', 1), 'kilograms': ('kg', 1), 'g': ('kg', 0.001), 'gr': ('kg', 0.001), 'gramos': ('kg', 0.001),
+    'grams': ('kg', 0.001),
+    'l': ('l', 1), 'lt': ('l', 1), 'litro': ('l', 1), 'litros': ('l', 1), 'liter': ('l', 1), 'liters': ('l', 1),
+    'litre': ('l', 1), 'litres': ('l', 1), 'ml': ('l', 0.001),
+    'm²': ('m²', 1), 'm2': ('m²', 1), 'metros cuadrados': ('m²', 1), 'metro cuadrado': ('m²', 1),
+    'square meters': ('m²', 1), 'square metres': ('m²', 1), 'sqm': ('m²', 1),
+    'm³': ('m³', 1), 'm3': ('m³', 1), 'metros cúbicos': ('m³', 1), 'cubic meters': ('m³', 1),
+    'm': ('m', 1), 'metro': ('m', 1), 'metros': ('m', 1), 'meter': ('m', 1), 'meters': ('m', 1),
+    'metre': ('m', 1), 'metres': ('m', 1), 'ml lineales': ('m', 1), 'cm': ('m', 0.01),
+    'ud': ('ud', 1), 'uds': ('ud', 1), 'u': ('ud', 1), 'unidad': ('ud', 1), 'unidades': ('ud', 1),
+    'unit': ('ud', 1), 'units': ('ud', 1), 'pieza': ('ud', 1), 'piezas': ('ud', 1), 'piece': ('ud', 1),
+    'pieces': ('ud', 1), 'pcs': ('ud', 1)
+}
+
+UNIT_PATTERN = "|".join(sorted((re.escape(unit) for unit in UNITS), key=len, reverse=True))
+# EU thousands ("1.234,5") are tried before plain decimals ("2,5", "2.5")
+NUMBER = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?(?!\d)|\d+(?:[.,]\d+)?"
+QUANTITY = re.compile(rf"({NUMBER})(?:\s*(?:-|–|a|to)\s*({NUMBER}))?\s*({UNIT_PATTERN})?(?![\w²³])", re.IGNORECASE)
+PACK_SIZE = re.compile(rf"({NUMBER})\s*({UNIT_PATTERN})(?![\w²³])", re.IGNORECASE)
+ITEM = re.compile(r"^\s*[-*]\s+\*\*(.+?)\*\*\s*:?\s*(.*)$")
+QUANTITY_LINE = re.compile(r"(?:quantity|cantidad|quantitat)\s*:\s*(.+)$", re.IGNORECASE)
+GENERIC_LABEL = re.compile(r"^(?:material|materiales|item)\s*\d*$", re.IGNORECASE)
+
+COLUMNS = {
+    'es': ('Material', 'Cantidad', 'Producto de referencia', 'Precio', 'Total', 'Total estimado',
+           'Sin precio en el índice de tiendas'),
+    'en': ('Material', 'Quantity', 'Reference product', 'Price', 'Total', 'Estimated total',
+           'No price in the store index')
+}
+
+
+def parse_quantity(text):
+    # "10 kg" -> (10.0, 'kg'); "500 g" -> (0.5, 'kg'); "2-3 litros" -> (3.0, 'l'); "1.000 m" -> (1000.0, 'm');
+    # "1.234,5 kg" -> (1234.5, 'kg'); a bare number counts units.
+    match = QUANTITY.search(text)
+    if match is None:
+        return None
+    base_unit, factor = UNITS.get((match.group(3) or 'ud').lower(), ('ud', 1))
+    return parse_number(match.group(2) or match.group(1)) * factor, base_unit
+
+def parse_materials(text):
+    """Returns ``{"item", "quantity", "unit"}`` records from the materials agent's markdown list.
+
+    Both the ``- **Material 1**: Cement`` + ``- Quantity: 10 kg`` layout of the
+    task's expected output and single lines like ``- **Cement**: 10 kg`` are read.
+    """
+    records = []
+    current = None
+    for line in str(text).splitlines():
+        item_match = ITEM.match(line)
+        if item_match:
+            label, rest = item_match.group(1).strip(), item_match.group(2).strip()
+            quantity = parse_quantity(rest) if rest and not GENERIC_LABEL.match(label) else None
+            item = rest if GENERIC_LABEL.match(label) and rest else label
+            current = {"item": item, "quantity": None, "unit": None}
+            if quantity is not None:
+                current["quantity"], current["unit"] = quantity
+            records.append(current)
+            continue
+        quantity_match = QUANTITY_LINE.search(line)
+        if current is not None and current["quantity"] is None and quantity_match:
+            quantity = parse_quantity(quantity_match.group(1))
+            if quantity is not None:
+                current["quantity"], current["unit"] = quantity
+    return [record for record in records if record["quantity"]]
+
+def material_records(materials):
+    # Same records from a structured materials result ({"items": [{"name", "quantity", "unit"}, ...]}).
+    records = []
+    for item in materials.get("items", []):
+        base_unit, factor = UNITS.get(str(item.get("unit", "ud")).lower(), ("ud", 1))
+        if item.get("quantity"):
+            records.append({"item": item["name"], "quantity": float(item["quantity"]) * factor, "unit": base_unit})
+    return records
+
+def pack_offer(record, products):
+    # First indexed product named like the material and sold in its unit, either priced per unit or as a pack
+    # of a stated size: (product, size, price, per_unit). Materials without such a product get NaN and are unpriced.
+    for product in products:
+        if not title_matches(record["item"], product["title"]):
+            continue
+        unit, factor = UNITS.get(product["unit"], (product["unit"], 1))
+        if unit == record["unit"]:
+            return product, factor, product["price"], True
+        pack = PACK_SIZE.search(product["title"])
+        if pack is not None:
+            unit, factor = UNITS[pack.group(2).lower()]
+            if unit == record["unit"]:
+                return product, parse_number(pack.group(1)) * factor, product["price"], False
+    return None, math.nan, math.nan, True
+
+def compute_costs(quantities, pack_sizes, pack_prices, per_unit=None):
+    """Packs needed and line totals for every material, in one vectorized pass.
+
+    Packs are rounded up to whole ones; materials sold per unit (``per_unit``)
+    are billed for the exact quantity. Materials without a price have NaN
+    sizes and prices, so their lines are NaN and left out of the total.
+    """
+    quantities = np.asarray(quantities, dtype=np.float64)
+    pack_sizes = np.asarray(pack_sizes, dtype=np.float64)
+    pack_prices = np.asarray(pack_prices, dtype=np.float64)
+    per_unit = np.zeros(len(quantities), dtype=bool) if per_unit is None else np.asarray(per_unit, dtype=bool)
+    # The small tolerance keeps 10 kg in 5 kg bags at 2 bags despite float rounding
+    packs = np.where(per_unit, quantities / pack_sizes, np.ceil(quantities / pack_sizes - 1e-9))
+    totals = packs * pack_prices
+    return packs, totals, float(np.nansum(totals))
+
+def format_number(value, decimals=2):
+    # EU format: 1.234,56
+    return f"{value:,.{decimals}f}".replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+
+def format_eur(value):
+    return f"{format_number(value)} €"
+
+def format_quantity(quantity, unit):
+    text = format_number(quantity, 2).rstrip("0").rstrip(",")
+    return f"{text} {unit}"
+
+def cost_table(records, price_index, language='es'):
+    """Markdown cost table for the materials, priced from the ``PriceIndex``; ``None`` if nothing could be priced."""
+    offers = [pack_offer(record, price_index.search(record["item"], limit=5, match_all=True)) for record in records]
+    packs, totals, total = compute_costs(
+        [record["quantity"] for record in records],
+        [pack_size for _, pack_size, _, _ in offers],
+        [pack_price for _, _, pack_price, _ in offers],
+        [per_unit for _, _, _, per_unit in offers]
+    )
+    if np.isnan(totals).all():
+        return None
+
+    material, quantity, product, price, line_total, estimated_total, unpriced = COLUMNS.get(language, COLUMNS['en'])
+    lines = [f"| {material} | {quantity} | {product} | {price} | {line_total} |", "|---|---|---|---|---|"]
+    missing = []
+    for record, (offer, pack_size, pack_price, per_unit), pack_count, amount in zip(records, offers, packs, totals):
+        if offer is None:
+            missing.append(record["item"])
+            continue
+        if per_unit:
+            price_text = f"{format_eur(pack_price)} / {format_quantity(pack_size, record['unit']) if pack_size != 1 else record['unit']}"
+        else:
+            price_text = f"{format_eur(pack_price)} ({format_quantity(pack_size, record['unit'])}) × {int(pack_count)}"
+        lines.append(
+            f"| {record['item']} | {format_quantity(record['quantity'], record['unit'])} | "
+            f"{offer['title']} ({offer['store']}) | {price_text} | {format_eur(amount)} |"
+        )
+    lines.append(f"| **{estimated_total}** | | | | **{format_eur(total)}** |")
+    if missing:
+        lines.append(f"\n{unpriced}: {', '.join(missing)}.")
+    return "\n".join(lines)
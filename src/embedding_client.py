@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from openai import APIConnectionError, AzureOpenAI, InternalServerError, RateLimitError
+
+import threading
+import tiktoken
+import time
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings client for the Azure ``MODEL_EMBEDDING`` deployment.
+
+    Texts are grouped into batches of at most ``max_batch_tokens`` tokens and
+    ``max_batch_size`` inputs, and up to ``max_concurrency`` batches are sent at
+    once. A 429 halves the number of requests allowed in flight and waits for
+    the server's Retry-After (or an exponential backoff); every
+    ``recovery_successes`` successful requests allow one more, up to
+    ``max_concurrency``. Connection errors, timeouts and 5xx responses are
+    retried with the same backoff, without changing the concurrency.
+    """
+
+    def __init__(self, client, deployment, max_batch_tokens=8000, max_batch_size=16, max_concurrency=4,
+                 max_retries=6, recovery_successes=8, encoding_name="cl100k_base"):
+        self.client = client
+        self.deployment = deployment
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.recovery_successes = recovery_successes
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+        self.limit = max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "texts": 0}
+
+    @classmethod
+    def from_credentials(cls, credentials, **kwargs):
+        client = AzureOpenAI(
+            api_key=credentials["AZURE_API_KEY"],
+            azure_endpoint=credentials["AZURE_ENDPOINT"],
+            api_version=credentials["AZURE_API_VERSION"],
+            # Retries (429s, connection errors and 5xx) are handled in embed_batch, which also adapts the concurrency
+            max_retries=0
+        )
+        return cls(client, credentials["MODEL_EMBEDDING"], **kwargs)
+
+    def batches(self, texts):
+        batch, batch_tokens = [], 0
+        for index, text in enumerate(texts):
+            tokens = len(self.encoding.encode(text))
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) == self.max_batch_size):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def release(self, outcome):
+        # outcome: "ok", "rate_limited" or "failed"; only successes count towards raising the limit again.
+        with self.condition:
+            self.active -= 1
+            if outcome == "rate_limited":
+                self.stats["rate_limited"] += 1
+                self.limit = max(1, self.limit // 2)
+                self.successes = 0
+            elif outcome == "failed":
+                self.stats["errors"] += 1
+            else:
+                self.successes += 1
+                if self.successes >= self.recovery_successes and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+    def retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return min(2 ** attempt, 30)
+
+    def embed_batch(self, texts, max_retries=None):
+        max_retries = max_retries or self.max_retries
+        for attempt in range(max_retries):
+            self.acquire()
+            try:
+                response = self.client.embeddings.create(model=self.deployment, input=texts)
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                self.release("rate_limited" if isinstance(e, RateLimitError) else "failed")
+                if attempt == max_retries - 1:
+                    raise
+                time.sleep(self.retry_delay(e, attempt))
+                continue
+            except Exception:
+                self.release("failed")
+                raise
+            self.release("ok")
+            with self.condition:
+                self.stats["requests"] += 1
+                self.stats["texts"] += len(texts)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def embed_documents(self, texts):
+        batches = list(self.batches(texts))
+        embeddings = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            results = executor.map(lambda batch: self.embed_batch([texts[i] for i in batch]), batches)
+            for batch, vectors in zip(batches, results):
+                for index, vector in zip(batch, vectors):
+                    embeddings[index] = vector
+        return embeddings
+
+    def embed_query(self, text):
+        # Queries are on a user's request path, so they give up sooner than ingestion batches.
+        return self.embed_batch([text], max_retries=min(self.max_retries, 3))[0]
@@ -0,0 +1,108 @@
+from src.relevance_classifier import LOCATION, MEASUREMENT
+
+import re
+import threading
+
+import tiktoken
+
+
+# Token budget and message roles each agent needs from the conversation history.
+AGENT_HISTORY = {
+    'relevance': {'budget': 1500, 'roles': ('user', 'assistant')},
+    'materials': {'budget': 600, 'roles': ('user',)},
+    'tools': {'budget': 600, 'roles': ('user',)},
+    'contractors': {'budget': 600, 'roles': ('user',)},
+    'presentation': {'budget': 1200, 'roles': ('user', 'assistant')}
+}
+
+AMOUNT = re.compile(r"(?:€|\$|£)\s*\d[\d.,]*|\d[\d.,]*\s*(?:€|\$|£|euros?\b|eur\b)", re.IGNORECASE)
+
+
+def project_facts(text):
+    # Dimensions, budget amounts and places stated in a user message: "12 m2", "2.000 €", "en Barcelona".
+    return [match.group(0).strip() for pattern in (MEASUREMENT, AMOUNT, LOCATION) for match in pattern.finditer(text)]
+
+
+class HistoryManager:
+    """Fits the conversation history into a per-agent token budget.
+
+    The newest messages are kept (each one cut to ``max_message_tokens``) and
+    older messages that no longer fit in the largest budget are folded into a
+    summary, which is included while it fits in the agent's budget. The summary
+    keeps the project facts (dimensions, budget, place) and the start of each
+    older user message; older assistant answers are dropped, since they are
+    derived from those messages.
+    """
+
+    def __init__(self, model="gpt-4", agent_history=None, max_message_tokens=300, summary_tokens=300):
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Azure deployment names such as "gpt4-prod" are not model names; GPT-4 class models use cl100k_base
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.agent_history = agent_history or AGENT_HISTORY
+        self.max_message_tokens = max_message_tokens
+        self.summary_tokens = summary_tokens
+        self.facts = []
+        self.summary_lines = []
+        self.summarized_count = 0
+        self.lock = threading.Lock()
+
+    def truncate(self, text, max_tokens):
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text, len(tokens)
+        return self.encoding.decode(tokens[:max_tokens]) + " [...]", max_tokens
+
+    def summary(self):
+        lines = [f"Project facts: {', '.join(self.facts)}"] if self.facts else []
+        return "\n".join(lines + self.summary_lines)
+
+    def fold(self, history):
+        # Messages older than what fits in the largest budget go into the summary, once each.
+        largest_budget = max(settings['budget'] for settings in self.agent_history.values())
+        used = 0
+        boundary = len(history)
+        while boundary > 0:
+            _, tokens = self.truncate(history[boundary - 1]['content'], self.max_message_tokens)
+            if used + tokens > largest_budget:
+                break
+            used += tokens
+            boundary -= 1
+
+        for message in history[self.summarized_count:boundary]:
+            if message['role'] != 'user':
+                continue
+            for fact in project_facts(message['content']):
+                if fact not in self.facts:
+                    self.facts.append(fact)
+            line, _ = self.truncate(message['content'], 60)
+            self.summary_lines.append(f"user: {' '.join(line.split())}")
+        self.summarized_count = max(self.summarized_count, boundary)
+
+        # Older user lines go first; the facts are only dropped (oldest first) once no line is left
+        while (self.summary_lines or self.facts) and len(self.encoding.encode(self.summary())) > self.summary_tokens:
+            (self.summary_lines or self.facts).pop(0)
+
+    def recent(self, history, agent_name):
+        settings = self.agent_history.get(agent_name)
+        if settings is None:
+            return []
+
+        with self.lock:
+            self.fold(history)
+            budget = settings['budget']
+            selected = []
+            for message in reversed(history[self.summarized_count:]):
+                if message['role'] not in settings['roles']:
+                    continue
+                content, tokens = self.truncate(message['content'], self.max_message_tokens)
+                if tokens > budget:
+                    break
+                budget -= tokens
+                selected.append({"role": message['role'], "content": content})
+
+            summary = self.summary()
+            if summary and len(self.encoding.encode(summary)) <= budget:
+                selected.append({"role": "summary", "content": summary})
+        return list(reversed(selected))
@@ -1,15 +1,27 @@
 
 from crewai import Agent, Task, Crew
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
 from langchain.tools import Tool
 from langchain_openai.chat_models.azure import AzureChatOpenAI
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
-
-from playwright.sync_api import sync_playwright
-from langchain.text_splitter import CharacterTextSplitter
-from threading import Thread
+from langchain_core.messages import HumanMessage, SystemMessage
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.semantic_cache import SemanticCache
+from src.response_template import LANGUAGE_NAMES, detect_language, render_response
+from src.relevance_classifier import NOT_RELATED, RELATED, RelevancePreClassifier
+from src.history_manager import HistoryManager
+from src.knowledge_base import KnowledgeBase
+from src.embedding_client import BatchedEmbeddings
+from src.browser_pool import BrowserPool
+from src.scrape_cache import ScrapeCache
+from src.search_cache import SearchCache
+from src.price_index import PriceIndex, scrape_products
+from src.cost_calculator import cost_table, material_records, parse_materials
+from src.specialist_outputs import SCHEMAS, parse_output, prompt_value, render_section, schema_instructions
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from queue import Queue
+from urllib.parse import quote_plus
 
 import yaml
 import os
@@ -29,12 +41,32 @@ def retry_with_backoff(func, max_retries=4):
                 raise
     return wrapper
 
+def reuse_agent(func):
+    # Agents only depend on the chatbot's LLM and tools, so each role is built once per chatbot.
+    def wrapper(self):
+        if func.__name__ not in self.agents:
+            self.agents[func.__name__] = func(self)
+        return self.agents[func.__name__]
+    return wrapper
+
 class CrewAIChatbot:
 
-    HISTORY_LIMIT = 30
+    SEMANTIC_CACHE_KEYS = ('materials', 'tools', 'safety_guidance')
 
-    def __init__(self, credentials_path):
+    def __init__(self, credentials_path, response_cache=None, semantic_cache_threshold=None, presentation_mode='llm',
+                 fast_relevance=False, scrape_cache=None, structured_outputs=False):
         self.credentials = self.load_credentials(credentials_path)
+        # Opt-in ResponseCache for final answers and per-agent results
+        self.response_cache = response_cache
+        # 'llm' composes the answer with presentation_agent, 'fast' renders it locally with render_response
+        self.presentation_mode = presentation_mode
+        # Opt-in keyword pre-classifier that answers clear cases without the relevance agent
+        self.relevance_classifier = RelevancePreClassifier() if fast_relevance else None
+        self.history_manager = HistoryManager(model=self.credentials["MODEL_NAME"])
+        # Opt-in JSON answers from the specialists, validated against src/specialist_outputs.py and stored as dicts
+        self.structured_outputs = structured_outputs
+        self.agents = {}
+        self.crews = {}
 
         self.task_dependencies = {
             'schedule': set(),  
@@ -59,9 +91,33 @@ class CrewAIChatbot:
             temperature=0.1
 
         )
+        self.embeddings = BatchedEmbeddings.from_credentials(self.credentials)
+        # Opt-in reuse of materials, tools and safety answers for near-duplicate projects
+        self.semantic_cache = None
+        if semantic_cache_threshold is not None:
+            self.semantic_cache = SemanticCache(self.embeddings, threshold=semantic_cache_threshold)
+        self.task_methods = {
+            'schedule': self.scheduling_task,
+            'materials': self.materials_task,
+            'tools': self.tools_task,
+            'contractors': self.contractor_search_task,
+            'safety_guidance': self.safety_task,
+            'cost_estimation': self.cost_estimation_task
+        }
+
         self.wrapper = DuckDuckGoSearchAPIWrapper(max_results=2 )
-        self.search_tool = DuckDuckGoSearchRun(api_wrapper =self.wrapper, source = "text", backend = "lite" )
-        # self.pdf_tools = self.load_pdf_tools()
+        # Agents share one memoized search: repeated queries are answered from memory and concurrent duplicates run once
+        self.search_cache = SearchCache(DuckDuckGoSearchRun(api_wrapper =self.wrapper, source = "text", backend = "lite" ))
+        self.search_tool = self.search_cache.as_tool()
+        # Renovation books indexed once with `python -m src.knowledge_base`
+        self.knowledge_base = KnowledgeBase(self.embeddings)
+        self.books_tool = self.knowledge_base.as_tool()
+        # Warm browsers shared by every chatbot in the process instead of a Chromium launch per scrape
+        self.browser_pool = BrowserPool.shared()
+        # Scraped store and contractor pages persist in db/scrape_cache.sqlite3 and are refreshed in the background
+        self.scrape_cache = scrape_cache if scrape_cache is not None else ScrapeCache()
+        # Store prices crawled ahead of time with `python -m src.price_index`
+        self.price_index = PriceIndex()
         
         self.context = {
             'guidance': None,
@@ -76,46 +132,35 @@ class CrewAIChatbot:
             'conversation_history': []
         }
 
-    def load_pdf_tools(self):
-        pdf_tools = []
-        pdf_dir = "data/"
-        text_splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        
-        for filename in os.listdir(pdf_dir):
-            if filename.endswith(".pdf"):
-                pdf_path = os.path.join(pdf_dir, filename)
-                loader = PyPDFLoader(pdf_path)
-                
-                try:
-                    documents = loader.load_and_split(text_splitter)
-                    print(f"Documents loaded for {filename}: {documents[:5]}")  
-                    
-                    if documents and isinstance(documents[0], str):
-                        limited_documents = documents[:5]
-                        pdf_tool = Tool(
-                            name=f"PDF_Reader_{filename}",
-                            func=lambda docs=limited_documents: "\n".join(docs),
-                            description=f"Use this tool to read and extract information from the PDF file {filename}"
-                        )
-                    elif documents and hasattr(documents[0], "page_content"):
-                        limited_documents = documents[:5]
-                        pdf_tool = Tool(
-                            name=f"PDF_Reader_{filename}",
-                            func=lambda docs=limited_documents: "\n".join([doc.page_content for doc in docs]),
-                            description=f"Use this tool to read and extract information from the PDF file {filename}"
-                        )
-                    else:
-                        print(f"Unexpected structure for documents in {filename}: {documents}")
-                        continue  
-                    pdf_tools.append(pdf_tool)
-                
-                except Exception as e:
-                    print(f"Error loading or splitting PDF {filename}: {e}")
-                    continue  
-        
-        return pdf_tools
-         
-    def scrape_pages(self, section_type):
+    async def scrape_page(self, page, page_data, section_type, query=None):
+        page_link = page_data["link"]
+        # Entries with a `search` URL template are searched for the query instead of opening the home page
+        if query and page_data.get("search"):
+            page_link = page_data["search"].format(query=quote_plus(query))
+        # Wait for the content itself rather than a fixed delay. A page that never shows it is reported as an error,
+        # which the scrape cache does not store, instead of empty details that would be cached as good data.
+        timeout = page_data.get("timeout", 8000)
+        try:
+            if section_type == "Stores":
+                details = await scrape_products(page, page_link, timeout)
+            else:
+                await page.goto(page_link, wait_until="domcontentloaded")
+                await page.wait_for_selector(".contact-info", timeout=timeout)
+                contact_info = await page.locator(".contact-info").all_inner_texts()
+                details = {
+                    "contact": contact_info[0] if contact_info else "Contact not found",
+                    "website": page_link,
+                }
+        except PlaywrightTimeoutError:
+            return {"name": page_data["name"], "error": f"Scraping failed: no content after {timeout / 1000:g} seconds"}
+
+        return {
+            "name": page_data["name"],
+            "description": page_data.get("description", "No description available."),
+            "details": details,
+        }
+
+    def scrape_pages(self, section_type, query=None):
     
         try:
             file_path = "data/sites/cost&contractors.yaml"
@@ -123,63 +168,194 @@ class CrewAIChatbot:
                 yaml_data = yaml.safe_load(file)
             
             pages = yaml_data.get(section_type, [])
+            # Cache misses load concurrently in the shared pool, so the scrape takes about as long as the slowest page
+            futures = [
+                self.scrape_cache.get(
+                    section_type, page_data["link"], query,
+                    lambda page_data=page_data: self.browser_pool.submit(
+                        lambda page: self.scrape_page(page, page_data, section_type, query)
+                    ),
+                    ttls=yaml_data.get("cache")
+                )
+                for page_data in pages
+            ]
             results = []
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                for page_data in pages:
-                    page_name = page_data["name"]
-                    page_link = page_data["link"]
-                    page_description = page_data.get("description", "No description available.")
-
-                    page = browser.new_page()
-                    page.goto(page_link)
-                    page.wait_for_timeout(2000)
-
-                    if section_type == "Stores":
-                        product_titles = page.locator(".product-title").all_inner_texts()
-                        product_prices = page.locator(".product-price").all_inner_texts()
-                        details = [
-                            {"title": title, "price": price}
-                            for title, price in zip(product_titles, product_prices)
-                        ]
-                    elif section_type == "Contractors":
-                        contact_info = page.locator(".contact-info").all_inner_texts()  
-                        details = {
-                            "contact": contact_info[0] if contact_info else "Contact not found",
-                            "website": page_link,
-                        }
-
-                    results.append({
-                        "name": page_name,
-                        "description": page_description,
-                        "details": details,
-                    })
-
-                browser.close()
+            for page_data, future in zip(pages, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append({"name": page_data["name"], "error": f"Scraping failed: {e}"})
             return results
         except Exception as e:
             return {"error": f"Scraping failed: {e}"}
 
-    def execute_task(self, task_method, context_key, question, execution_times):
+    def store_prices(self, query):
+        # Answered from the local price index; the stores are only scraped while that index is still empty.
+        if self.price_index.count() == 0:
+            return self.scrape_pages("Stores", query)
+        return self.price_index.search_text(query)
+
+    def local_cost_estimation(self, question):
+        # Costs computed from the price index, so the LLM does no arithmetic; None falls back to the cost agent.
+        materials = self.context['materials']
+        records = material_records(materials) if isinstance(materials, dict) else parse_materials(materials or "")
+        if not records or self.price_index.count() == 0:
+            return None
+        return cost_table(records, self.price_index, detect_language(question))
+
+    def execute_task(self, task_method, context_key, question, execution_times, on_result=None):
         start_time = time.time()
         try:
-            task = task_method(question)
-            crew = Crew(agents=[task.agent], tasks=[task], verbose=True)
-            result = crew.kickoff()
+            cache_key = None
+            result = None
+            if self.response_cache is not None:
+                cache_key = self.response_cache.make_key(context_key, question, self.context['conversation_history'])
+                result = self.response_cache.get(cache_key)
+
+            use_semantic_cache = self.semantic_cache is not None and context_key in self.SEMANTIC_CACHE_KEYS
+            if result is None and use_semantic_cache:
+                result, score = self.semantic_cache.lookup(context_key, self.project_description(question))
+                if result is not None:
+                    print(f"Semantic cache hit for {context_key} (similarity {score:.3f})")
+
+            if result is None and context_key == 'cost_estimation':
+                result = self.local_cost_estimation(question)
+
+            if result is None:
+                task = task_method(question)
+                structured = self.structured_outputs and context_key in SCHEMAS
+                if structured:
+                    task.expected_output = schema_instructions(context_key)
+                crew = self.get_crew(context_key, task)
+                result = crew.kickoff()
             
-            if result.lower().startswith('question:'):
-                return result.split(':', 1)[1].strip()
+                if result.lower().startswith('question:'):
+                    return result.split(':', 1)[1].strip()
+
+                if structured:
+                    parsed = parse_output(context_key, result)
+                    if parsed is None:
+                        print(f"{context_key.replace('_', ' ').title()} did not match its schema, keeping the text answer")
+                    else:
+                        result = parsed
+
+                if cache_key is not None:
+                    self.response_cache.set(cache_key, result)
+                if use_semantic_cache:
+                    self.semantic_cache.add(context_key, self.project_description(question), result)
                 
             self.context[context_key] = result
             execution_times[context_key] = round(time.time() - start_time, 2)
             print(f"{context_key.replace('_', ' ').title()} took: {execution_times[context_key]} seconds")
+            if on_result is not None:
+                if isinstance(result, dict):
+                    result = render_section(context_key, result, detect_language(self.project_description(question)))
+                on_result(context_key, result)
             
             return None  
         except Exception as e:
             print(f"Error in {context_key}: {str(e)}")
             raise
 
+    def recent_history(self, agent_name):
+        # Only the slice of the conversation that fits the agent's token budget
+        return self.history_manager.recent(self.context['conversation_history'], agent_name)
+
+    def project_description(self, question, turns=3):
+        # The user's recent messages describe the project better than the last answer alone.
+        user_messages = [message['content'] for message in self.context['conversation_history'] if message['role'] == 'user']
+        if not user_messages or user_messages[-1] != question:
+            user_messages.append(question)
+        return "\n".join(user_messages[-turns:])
+
+    def get_crew(self, context_key, task):
+        # One single-agent Crew per role, kept across questions and pointed at the new task.
+        # crewai's tool cache never expires and would last as long as these reused crews and agents, so it is off
+        # there; SearchCache, ScrapeCache and the price index decide how long tool results are reused.
+        crew = self.crews.get(context_key)
+        if crew is None:
+            crew = self.crews[context_key] = Crew(agents=[task.agent], tasks=[task], verbose=True, cache=False)
+        else:
+            crew.tasks = [task]
+        return crew
+
+    def execute_task_graph(self, question, execution_times, on_result=None):
+        # Launch every task as soon as all of its dependencies are stored in the context,
+        # instead of waiting for a whole level of tasks to finish.
+        pending = {key: method for key, method in self.task_methods.items() if not self.context.get(key)}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=len(self.task_methods)) as executor:
+            while pending or running:
+                for context_key in list(pending):
+                    dependencies = self.task_dependencies.get(context_key, set())
+                    if any(dep in pending or dep in running.values() for dep in dependencies):
+                        continue
+
+                    task_method = pending.pop(context_key)
+                    if all(self.context.get(dep) for dep in dependencies):
+                        future = executor.submit(self.execute_task, task_method, context_key, question, execution_times, on_result)
+                        running[future] = context_key
+                    else:
+                        print(f"Skipping {context_key}: missing results from {', '.join(sorted(dependencies))}")
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    context_key = running.pop(future)
+                    if future.exception() is not None:
+                        print(f"{context_key.replace('_', ' ').title()} failed, dependent tasks will be skipped")
+
+        return self.critical_path(execution_times)
+
+    async def aexecute_task_graph(self, question, execution_times):
+        # Same scheduling as execute_task_graph, with every task as a coroutine awaiting its dependencies.
+        tasks = {}
+
+        async def run_when_ready(task_method, context_key):
+            dependencies = self.task_dependencies.get(context_key, set())
+            await asyncio.gather(*(tasks[dep] for dep in dependencies if dep in tasks), return_exceptions=True)
+            if not all(self.context.get(dep) for dep in dependencies):
+                print(f"Skipping {context_key}: missing results from {', '.join(sorted(dependencies))}")
+                return None
+            # crewai agents with tools only have a blocking executor, so they run on the loop's thread pool.
+            return await asyncio.to_thread(self.execute_task, task_method, context_key, question, execution_times)
+
+        for context_key, task_method in self.task_methods.items():
+            if not self.context.get(context_key):
+                tasks[context_key] = asyncio.ensure_future(run_when_ready(task_method, context_key))
+
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return self.critical_path(execution_times)
+
+    def llm_task_messages(self, task):
+        agent = task.agent
+        return [
+            SystemMessage(content=f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"),
+            HumanMessage(content=f"{task.description}\n\nThis is the expect criteria for your final answer: {task.expected_output}")
+        ]
+
+    async def arun_llm_task(self, task):
+        # Agents without tools need a single completion, so the LLM is awaited directly instead of a Crew.
+        message = await self.llm.ainvoke(self.llm_task_messages(task))
+        return message.content
+
+    def critical_path(self, execution_times):
+        # Longest chain of dependent tasks, weighted by their measured durations.
+        chains = {}
+
+        def longest_chain(context_key):
+            if context_key not in chains:
+                previous = [longest_chain(dep) for dep in self.task_dependencies.get(context_key, set()) if dep in execution_times]
+                path, duration = max(previous, key=lambda chain: chain[1], default=([], 0))
+                chains[context_key] = (path + [context_key], round(duration + execution_times[context_key], 2))
+            return chains[context_key]
+
+        finished = [longest_chain(key) for key in self.task_methods if key in execution_times]
+        return max(finished, key=lambda chain: chain[1], default=([], 0))
+
 
 
     def load_credentials(self, path):
@@ -202,12 +378,14 @@ class CrewAIChatbot:
         }
 
     ##------------------------------------AGENTS------------------------------------
+    @reuse_agent
     def relevance_agent(self):
         return Agent(
             role='Relevance Checker and Information Gatherer',
             goal='Determine if a query is related to home improvement projects and gather all necessary information.',
             tools=[],
             verbose=True,
+            cache=False,
             backstory=(
                 "You are an expert in home improvement projects with excellent communication skills. "
                 "Your task has TWO parts:\n"
@@ -226,12 +404,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
 
+    @reuse_agent
     def materials_agent(self):
         return Agent(
             role='Materials Expert',
             goal='Provide a detailed list of materials used for the job.',
             tools=[self.search_tool],
             verbose=True,
+            cache=False,
             backstory=(
                 "You are an experienced expert in construction. "
                 "You are an expert in forecasting materials and determining the required quantity of each material, provided the user's instructions are sufficient."
@@ -243,12 +423,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
 
+    @reuse_agent
     def tools_agent(self):
         return Agent(
             role='Tools Expert',
             goal='Based on the task context, provide a specific list of tools needed for the job.',
             tools=[self.search_tool],
             verbose=True,
+            cache=False,
             backstory=(
             "You are an expert in selecting the right tools for specific construction tasks. "
             "You have access to a comprehensive list of tools scraped from reliable sources. "
@@ -260,16 +442,21 @@ class CrewAIChatbot:
             llm=self.llm
         )
     
+    @reuse_agent
     def cost_agent(self):
         return Agent(
             role='Cost Determinator',
             goal='Provide cost estimations for materials, considering the user’s location and preferred currency.',
             tools=[Tool(
                     name="Store Search",
-                    func=lambda query: self.scrape_pages("Stores", query),
-                    description="Search all predefined stores for material prices and availability."
+                    func=self.store_prices,
+                    description=(
+                        "Look up current prices of a material or tool in the predefined stores. "
+                        "The input is a short product name, e.g. 'pintura plástica blanca'."
+                    )
                 )],
             verbose=True,
+            cache=False,
             backstory=(
             "You are a very quick and efficient cost calculator. "
             "Your role is to provide cost estimations for materials or tools, converting them into the currency based on the user's location. "
@@ -281,12 +468,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
     
+    @reuse_agent
     def contractor_search_agent(self):
         return Agent(
             role='Contractor Finder',
             goal='Search for contractors who can handle home improvement projects and provide contact details or links for budget estimation.',
             tools=[self.search_tool],
             verbose=True,
+            cache=False,
             backstory=(
                 "You are a very quick and efficient expert in finding reliable contractors for home improvement projects. "
                 "Your role is to find contractors based on the user’s project description, preferably near their location. "
@@ -296,12 +485,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
     
+    @reuse_agent
     def safety_agent(self):
         return Agent(
             role='Safety-Focused Task Guide',
             goal='Provide step-by-step instructions for tasks in a way that maximizes safety and minimizes the risk of accidents.',
-            tools=[self.search_tool],
+            tools=[self.search_tool, self.books_tool],
             verbose=True,
+            cache=False,
             backstory=(
                 "You are a safety-focused expert responsible for guiding users through tasks with an emphasis on preventing accidents. "
                 "Your role is to identify potential hazards and offer specific, precautionary steps to ensure safety. "
@@ -313,12 +504,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
     
+    @reuse_agent
     def scheduler_agent(self):
         return Agent(
             role='Project Analyzer and Scheduler',
             goal='Analyze project requirements, identify missing information, and create schedule with guidance.',
-            tools=[self.search_tool],# + self.pdf_tools,
+            tools=[self.search_tool, self.books_tool],
             verbose=True,
+            cache=False,
             backstory=(
                 "You are a quick and efficient analysis who evaluates all work information "
                 "for the entire project lifecycle including materials, tools, costs, safety, and execution. "
@@ -330,12 +523,14 @@ class CrewAIChatbot:
             llm=self.llm
         )
     
+    @reuse_agent
     def presentation_agent(self):
         return Agent(
             role="Presentation Expert",
             goal="Compose a clear, well-structured response with all gathered project details in the user's language.",
             tools=[],  
             verbose=True,
+            cache=False,
             backstory=(
                 "You are a quick and efficient expert responsible for assembling and presenting all project information "
                 "in a clear and structured format. Your role is to create a coherent response that includes project guidance, "
@@ -350,7 +545,7 @@ class CrewAIChatbot:
     
     @retry_with_backoff
     def check_relevance_task(self, question):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
+        recent_history = self.recent_history('relevance')
 
         return Task(
             description=(
@@ -385,7 +580,7 @@ class CrewAIChatbot:
 
     @retry_with_backoff
     def materials_task(self, project_description):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
+        recent_history = self.recent_history('materials')
         return Task(
             description=(
                 f"Consider the conversation history: {recent_history}. "
@@ -395,7 +590,8 @@ class CrewAIChatbot:
             ),
             agent=self.materials_agent(),
             expected_output=(
-                "Answer with a markdown list of materials, including the estimated required quantities, e.g.:"
+                "Answer with a markdown list of materials, including the estimated required quantities "
+                "as a single number and a metric unit (kg, l, m², m or units), e.g.:"
                 "\n- **Material 1**: High-quality cement\n"
                 "  - Quantity: 10 kg\n"
                 "- **Material 2**: Paint (white)\n"
@@ -406,7 +602,7 @@ class CrewAIChatbot:
 
     @retry_with_backoff
     def tools_task(self, project_description):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
+        recent_history = self.recent_history('tools')
         return Task(
             description=f"Consider the conversation history: {recent_history}."
                         f"List the tools required for the following project: {project_description}. "
@@ -424,10 +620,9 @@ class CrewAIChatbot:
  
     @retry_with_backoff
     def cost_estimation_task(self, materials_list):
-        materials = self.context['materials']
+        materials = prompt_value(self.context['materials'])
         while materials is None:
             time.sleep(5) 
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
         return Task(
             description=(
 
@@ -451,7 +646,7 @@ class CrewAIChatbot:
 
     @retry_with_backoff
     def contractor_search_task(self, project_description):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
+        recent_history = self.recent_history('contractors')
         return Task(
             description=(
                 f"Consider the conversation history: {recent_history}."
@@ -494,7 +689,6 @@ class CrewAIChatbot:
 
     @retry_with_backoff
     def scheduling_task(self, project_description, deadline=None):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
         return Task(
             description=(
                 f"Create a schedule and guide for: {project_description}.\n"
@@ -525,13 +719,13 @@ class CrewAIChatbot:
 
     @retry_with_backoff
     def presentation_task(self, task_description):
-        recent_history = self.context['conversation_history'][-self.HISTORY_LIMIT:]
-        materials = self.context['materials']
-        tools = self.context['tools']
-        contractors = self.context['contractors']
+        recent_history = self.recent_history('presentation')
+        materials = prompt_value(self.context['materials'])
+        tools = prompt_value(self.context['tools'])
+        contractors = prompt_value(self.context['contractors'])
         cost_estimation = self.context['cost_estimation']
-        safety_guidance = self.context['safety_guidance']
-        schedule = self.context.get('schedule')  
+        safety_guidance = prompt_value(self.context['safety_guidance'])
+        schedule = prompt_value(self.context.get('schedule'))
 
         return Task(
             description=(
@@ -568,69 +762,239 @@ class CrewAIChatbot:
 
     ##------------------------------------CREATE CREW------------------------------------
 
-    def get_response(self, question):
-        try:
-
-            self.context['conversation_history'].append({"role": "user", "content": question})
-            execution_times = {}
-            start_time = time.time() 
+    def fast_relevance_result(self, question):
+        # Same format as the relevance agent's answer, or None when the query needs the agent.
+        if self.relevance_classifier is None:
+            return None
+        label = self.relevance_classifier.classify(question, self.project_description(question))
+        print(f"Relevance pre-classifier: {label}")
+        if label == NOT_RELATED:
+            return f"NOT RELATED: {self.relevance_classifier.redirection(question)}"
+        if label == RELATED:
+            return "RELATED: "
+        return None
+
+    def relevance_reply(self, relevance_result):
+        if relevance_result.lower().startswith('not related:') or relevance_result.lower().startswith('question:'):
+            return relevance_result.split(':', 1)[1].strip()
+        return None
+
+    def report_execution_times(self, execution_times, request_start):
+        total_time = round(time.time() - request_start, 2)
+        print(f"\nTotal execution time: {total_time} seconds") 
+
+        print("\nExecution time summary (tasks in the graph overlap):") 
+        for task, time_taken in execution_times.items(): 
+            percentage = round((time_taken / max(total_time, 0.01)) * 100, 1) 
+            print(f"{task.replace('_', ' ').title()}: {time_taken}s ({percentage}%)") 
+
+        if self.response_cache is not None:
+            print(f"Response cache: {self.response_cache.stats()}")
+        if self.semantic_cache is not None:
+            print(f"Semantic cache: {self.semantic_cache.stats()}")
+        if any(self.scrape_cache.stats.values()):
+            print(f"Scrape cache: {self.scrape_cache.stats}")
+        if self.search_cache.request_stats["searches"]:
+            print(f"Web searches: {self.search_cache.request_stats} (since start: {self.search_cache.stats})")
+
+    def fast_presentation(self, question):
+        # Specialists already answer in markdown, so the final answer is assembled locally.
+        # The LLM is only used when the assembled answer is not in the user's language.
+        start_time = time.time()
+        language = detect_language(self.project_description(question))
+        final_result = render_response(self.context, language)
+        if detect_language(final_result) != language:
+            message = self.llm.invoke([
+                SystemMessage(content=(
+                    f"Translate the following markdown into {LANGUAGE_NAMES.get(language, language)}. "
+                    "Keep the headings, lists, tables, numbers and links unchanged."
+                )),
+                HumanMessage(content=final_result)
+            ])
+            final_result = message.content
+        print(f"Fast presentation took: {round(time.time() - start_time, 2)} seconds")
+        return final_result
+
+    def start_request(self, question):
+        # The cache is looked up before the question is added to the history, so the key covers the previous turns only.
+        cache_key, cached_result = None, None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.make_key('response', question, self.context['conversation_history'])
+            cached_result = self.response_cache.get(cache_key)
+
+        self.context['conversation_history'].append({"role": "user", "content": question})
+        self.search_cache.reset_request_stats()
+        if cached_result is not None:
+            print(f"Response cache hit: {self.response_cache.stats()}")
+            self.context['conversation_history'].append({"role": "assistant", "content": cached_result})
+        return cache_key, cached_result
+
+    def finish_request(self, cache_key, final_result, execution_times, request_start):
+        self.report_execution_times(execution_times, request_start)
+
+        self.reset_project()
+
+        if cache_key is not None:
+            self.response_cache.set(cache_key, final_result)
+        self.context['conversation_history'].append({"role": "assistant", "content": final_result})
+
+    def run_specialists(self, question, execution_times, on_result=None):
+        # Relevance check and task graph. Returns the reply when the request stops before the presentation step.
+        start_time = time.time() 
+        relevance_result = self.fast_relevance_result(question)
+        if relevance_result is None:
             relevance_task = self.check_relevance_task(question)
-            relevance_crew = Crew(
-                agents=[relevance_task.agent],
-                tasks=[relevance_task],
-                verbose=True
-            )
+            relevance_crew = self.get_crew('relevance', relevance_task)
             relevance_result = relevance_crew.kickoff()
-            execution_times['relevance'] = round(time.time() - start_time, 2) 
-            print(f"Relevance check took: {execution_times['relevance']} seconds") 
-
-            if relevance_result.lower().startswith('not related:') or relevance_result.lower().startswith('question:'):
-                return relevance_result.split(':', 1)[1].strip()
-
-            task_groups = [
-                [(self.scheduling_task, 'schedule')],
-                [(self.materials_task, 'materials'),
-                (self.tools_task, 'tools'),
-                (self.contractor_search_task, 'contractors'),
-                (self.safety_task, 'safety_guidance')],
-                [(self.cost_estimation_task, 'cost_estimation')]
-            ]
-            for level_tasks in task_groups:
-                threads = []
-                for task_method, context_key in level_tasks:
-                    if not self.context.get(context_key):
-                        dependencies = self.task_dependencies.get(context_key, set())
-                        if all(self.context.get(dep) for dep in dependencies):
-                            thread = Thread(
-                                target=self.execute_task,
-                                args=(task_method, context_key, question, execution_times)
-                            )
-                            threads.append(thread)
-                            thread.start()
-                
-                for thread in threads:
-                    thread.join()
+        execution_times['relevance'] = round(time.time() - start_time, 2) 
+        print(f"Relevance check took: {execution_times['relevance']} seconds") 
+
+        reply = self.relevance_reply(relevance_result)
+        if reply is not None:
+            return reply
 
+        graph_start = time.time()
+        path, path_time = self.execute_task_graph(question, execution_times, on_result)
+        graph_time = round(time.time() - graph_start, 2)
+        print(f"Task graph took: {graph_time} seconds")
+        print(f"Critical path: {' -> '.join(path)} ({path_time} seconds)")
+        return None
 
+    def get_response(self, question):
+        try:
+
+            cache_key, cached_result = self.start_request(question)
+            if cached_result is not None:
+                return cached_result
+
+            execution_times = {}
+            request_start = time.time()
+            reply = self.run_specialists(question, execution_times)
+            if reply is not None:
+                return reply
 
             start_time = time.time() 
-            presentation_task = self.presentation_task(question)
-            presentation_crew = Crew(agents=[presentation_task.agent], tasks=[presentation_task], verbose=True)
-            final_result = presentation_crew.kickoff()
+            if self.presentation_mode == 'fast':
+                final_result = self.fast_presentation(question)
+            else:
+                presentation_task = self.presentation_task(question)
+                presentation_crew = self.get_crew('presentation', presentation_task)
+                final_result = presentation_crew.kickoff()
             execution_times['presentation'] = round(time.time() - start_time, 2) 
             print(f"Presentation took: {execution_times['presentation']} seconds") 
 
-            total_time = round(sum(execution_times.values()), 2) 
-            print(f"\nTotal execution time: {total_time} seconds") 
+            self.finish_request(cache_key, final_result, execution_times, request_start)
+
+            return final_result
+
+        except AttributeError as e:
+            return f"Sorry, there was an issue with one of the tools or attributes: {str(e)}"
+        except Exception as e:
+            return f"An error occurred while processing your request: {str(e)}"
+        finally:
+            self.reset_project()
 
-            print("\nExecution time summary:") 
-            for task, time_taken in execution_times.items(): 
-                percentage = round((time_taken / total_time) * 100, 1) 
-                print(f"{task.replace('_', ' ').title()}: {time_taken}s ({percentage}%)") 
+    def stream_events(self, question, present=True):
+        # Yields event dicts as the request progresses:
+        #   {"type": "section", "key": context_key, "content": ...} as soon as each specialist result is stored,
+        #   {"type": "token", "content": ...} for every presentation token (only when present=True),
+        #   {"type": "final", "content": ...} with the complete answer, or {"type": "error", "content": ...}.
+        # With present=False, or in 'fast' presentation mode, the answer is rendered locally instead.
+        try:
 
+            cache_key, cached_result = self.start_request(question)
+            if cached_result is not None:
+                yield {"type": "final", "content": cached_result}
+                return
+
+            execution_times = {}
+            request_start = time.time()
+            events = Queue()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                specialists = executor.submit(
+                    self.run_specialists, question, execution_times,
+                    lambda context_key, result: events.put({"type": "section", "key": context_key, "content": result})
+                )
+                specialists.add_done_callback(lambda _: events.put(None))
+                while (event := events.get()) is not None:
+                    yield event
+
+            reply = specialists.result()
+            if reply is not None:
+                yield {"type": "final", "content": reply}
+                return
+
+            start_time = time.time()
+            if present and self.presentation_mode != 'fast':
+                presentation_task = self.presentation_task(question)
+                chunks = []
+                for chunk in self.llm.stream(self.llm_task_messages(presentation_task)):
+                    if not chunks:
+                        print(f"Presentation first token after: {round(time.time() - request_start, 2)} seconds")
+                    chunks.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+                final_result = "".join(chunks)
+            else:
+                final_result = self.fast_presentation(question)
+            execution_times['presentation'] = round(time.time() - start_time, 2)
+            print(f"Presentation took: {execution_times['presentation']} seconds")
+
+            self.finish_request(cache_key, final_result, execution_times, request_start)
+            yield {"type": "final", "content": final_result}
+
+        except AttributeError as e:
+            yield {"type": "error", "content": f"Sorry, there was an issue with one of the tools or attributes: {str(e)}"}
+        except Exception as e:
+            yield {"type": "error", "content": f"An error occurred while processing your request: {str(e)}"}
+        finally:
+            # Also when the stream is closed early, so its results never reach the next question
             self.reset_project()
 
-            self.context['conversation_history'].append({"role": "assistant", "content": final_result})
+    def stream_response(self, question):
+        # Text-only view of stream_events: presentation tokens, or the whole reply when nothing was streamed.
+        streamed = False
+        for event in self.stream_events(question):
+            if event["type"] == "token":
+                streamed = True
+                yield event["content"]
+            elif event["type"] == "error" or (event["type"] == "final" and not streamed):
+                yield event["content"]
+
+    async def aget_response(self, question):
+        try:
+
+            cache_key, cached_result = self.start_request(question)
+            if cached_result is not None:
+                return cached_result
+
+            execution_times = {}
+            request_start = time.time()
+            start_time = time.time()
+            relevance_result = self.fast_relevance_result(question)
+            if relevance_result is None:
+                relevance_result = await self.arun_llm_task(self.check_relevance_task(question))
+            execution_times['relevance'] = round(time.time() - start_time, 2)
+            print(f"Relevance check took: {execution_times['relevance']} seconds")
+
+            reply = self.relevance_reply(relevance_result)
+            if reply is not None:
+                return reply
+
+            graph_start = time.time()
+            path, path_time = await self.aexecute_task_graph(question, execution_times)
+            graph_time = round(time.time() - graph_start, 2)
+            print(f"Task graph took: {graph_time} seconds")
+            print(f"Critical path: {' -> '.join(path)} ({path_time} seconds)")
+
+            start_time = time.time()
+            if self.presentation_mode == 'fast':
+                final_result = await asyncio.to_thread(self.fast_presentation, question)
+            else:
+                final_result = await self.arun_llm_task(self.presentation_task(question))
+            execution_times['presentation'] = round(time.time() - start_time, 2)
+            print(f"Presentation took: {execution_times['presentation']} seconds")
+
+            self.finish_request(cache_key, final_result, execution_times, request_start)
 
             return final_result
 
@@ -638,4 +1002,5 @@ class CrewAIChatbot:
             return f"Sorry, there was an issue with one of the tools or attributes: {str(e)}"
         except Exception as e:
             return f"An error occurred while processing your request: {str(e)}"
-
+        finally:
+            self.reset_project()
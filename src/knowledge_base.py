@@ -0,0 +1,318 @@
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain.tools import Tool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pypdf import PdfReader
+from src.chunking import VERSION as CHUNKING_VERSION, make_splitter
+from src.quantized_index import QuantizedIndex
+from src.reranker import Reranker
+from src.price_index import STOPWORDS
+from src.response_cache import normalize_question
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import yaml
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def fts_query(query):
+    # Quoted terms joined with OR; chroma's FTS5 table uses the trigram tokenizer, so shorter terms never match.
+    # Stopwords are left out: "con" or "una" would match almost every chunk.
+    terms = {term for term in re.findall(r"\w+", query.lower()) if len(term) >= 3 and normalize_question(term) not in STOPWORDS}
+    return " OR ".join(f'"{term}"' for term in sorted(terms))
+
+def reciprocal_rank_fusion(rankings, k=60):
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def parse_page_range(pdf_path, start, stop, chunk_size, chunk_overlap, strategy="structure"):
+    # Runs in a worker process: extracts and splits pages [start, stop) of one PDF.
+    reader = PdfReader(pdf_path)
+    text_splitter = make_splitter(strategy, chunk_size, chunk_overlap)
+    return [
+        (page_number, text, text_splitter.split_text(text))
+        for page_number, text in ((n, reader.pages[n].extract_text()) for n in range(start, stop))
+    ]
+
+def parse_pdf(pdf_path, chunk_size, chunk_overlap, executor=None, pages_per_task=16, strategy="structure"):
+    """Returns ``(page_number, text, chunks)`` for every page, in page order.
+
+    With an ``executor`` the pages are parsed and split in ranges of
+    ``pages_per_task`` across its worker processes.
+    """
+    page_count = len(PdfReader(pdf_path).pages)
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    if executor is None:
+        results = [parse_page_range(pdf_path, start, stop, chunk_size, chunk_overlap, strategy) for start, stop in ranges]
+    else:
+        futures = [
+            executor.submit(parse_page_range, pdf_path, start, stop, chunk_size, chunk_overlap, strategy)
+            for start, stop in ranges
+        ]
+        results = [future.result() for future in futures]
+    return [page for pages in results for page in pages]
+
+
+class KnowledgeBase:
+    """Renovation books from ``data/`` chunked and embedded once into the Chroma store in ``db/``.
+
+    A manifest next to the store records the hash of every file and page and
+    the ids of the chunks embedded for each page, so ``ingest`` only embeds
+    new or changed pages and deletes the chunks of removed files and pages.
+    It also records the chunking settings, and a change to them re-chunks
+    every file.
+    After every change the vectors are also exported to a memory-mapped int8
+    ``QuantizedIndex``, which serves the kNN side of the searches. The fused
+    candidates go through a ``Reranker`` before reaching the agents.
+    """
+
+    COLLECTION_NAME = "renovation_books"
+
+    def __init__(self, embeddings, params_path="config/ragllm_params.yml", persist_directory="db/"):
+        with open(params_path, "r") as stream:
+            self.params = yaml.safe_load(stream)
+        self.datapath = self.params["datapath"]
+        self.chunking = {
+            "version": CHUNKING_VERSION,
+            "strategy": self.params.get("chunking_strategy", "structure"),
+            "chunk_size": self.params["chunk_size"],
+            "chunk_overlap": self.params["chunk_overlap"]
+        }
+        self.manifest_path = os.path.join(persist_directory, f"{self.COLLECTION_NAME}_manifest.json")
+        self.embeddings = embeddings
+        self.quantized_index_path = os.path.join(persist_directory, f"{self.COLLECTION_NAME}_int8")
+        self.quantized_index = QuantizedIndex(self.quantized_index_path) if QuantizedIndex.exists(self.quantized_index_path) else None
+        self.reranker = Reranker(
+            model_name=self.params.get("rerank_model"),
+            lambda_mult=self.params.get("mmr_lambda", 0.5),
+            max_overlap=self.params["chunk_overlap"] * 2
+        )
+        self.vectorstore = Chroma(
+            collection_name=self.COLLECTION_NAME,
+            embedding_function=embeddings,
+            persist_directory=persist_directory
+        )
+        # Read-only connection to chroma's own SQLite file for the FTS5 full-text index
+        self.fts_connection = sqlite3.connect(
+            f"file:{os.path.join(persist_directory, 'chroma.sqlite3')}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.metadata_segment = self.fts_connection.execute(
+            "SELECT id FROM segments WHERE collection = ? AND scope = 'METADATA'",
+            (str(self.vectorstore._collection.id),)
+        ).fetchone()
+
+    def count(self):
+        return self.vectorstore._collection.count()
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"files": {}}
+        with open(self.manifest_path, "r") as stream:
+            return json.load(stream)
+
+    def save_manifest(self, manifest):
+        with open(self.manifest_path, "w") as stream:
+            json.dump(manifest, stream, indent=1)
+
+    def delete_chunks(self, ids):
+        if ids:
+            self.vectorstore.delete(ids=ids)
+        return len(ids)
+
+    def ingest_file(self, filename, file_entry, executor=None):
+        # Re-embeds only the pages whose text changed; returns (entry, embedded, skipped, deleted).
+        pdf_path = os.path.join(self.datapath, filename)
+        pages = parse_pdf(
+            pdf_path, self.chunking["chunk_size"], self.chunking["chunk_overlap"], executor, strategy=self.chunking["strategy"]
+        )
+        old_pages = file_entry.get("pages", {}) if file_entry else {}
+        new_pages = {}
+        chunks, chunk_ids = [], []
+        skipped = deleted = 0
+
+        for page, text, texts in pages:
+            page_number = str(page)
+            page_hash = content_hash(text)
+            old_page = old_pages.get(page_number)
+            if old_page and old_page["hash"] == page_hash:
+                new_pages[page_number] = old_page
+                skipped += len(old_page["ids"])
+                continue
+
+            if old_page:
+                deleted += self.delete_chunks(old_page["ids"])
+            ids = [f"{filename}:{page_number}:{i}" for i in range(len(texts))]
+            chunks.extend(Document(page_content=chunk, metadata={"source": pdf_path, "page": page}) for chunk in texts)
+            chunk_ids.extend(ids)
+            new_pages[page_number] = {"hash": page_hash, "ids": ids}
+
+        for page_number, old_page in old_pages.items():
+            if page_number not in new_pages:
+                deleted += self.delete_chunks(old_page["ids"])
+
+        # One call per file, so the embedding client can batch and parallelize the requests
+        if chunks:
+            self.vectorstore.add_documents(chunks, ids=chunk_ids)
+        return {"pages": new_pages}, len(chunks), skipped, deleted
+
+    def ingest(self, rebuild=False, workers=None):
+        start_time = time.time()
+        manifest = {"files": {}} if rebuild else self.load_manifest()
+        if manifest["files"] and manifest.get("chunking") != self.chunking:
+            print(f"Chunking settings changed to {self.chunking}, re-chunking every file")
+            rebuild = True
+            manifest = {"files": {}}
+        manifest["chunking"] = self.chunking
+        if rebuild:
+            self.delete_chunks(self.vectorstore.get(include=[])["ids"])
+
+        stats = {"embedded": 0, "skipped": 0, "deleted": 0}
+        filenames = sorted(filename for filename in os.listdir(self.datapath) if filename.endswith(".pdf"))
+
+        for filename in list(manifest["files"]):
+            if filename not in filenames:
+                removed = manifest["files"].pop(filename)
+                stats["deleted"] += self.delete_chunks([i for page in removed["pages"].values() for i in page["ids"]])
+                print(f"Removed {filename}")
+
+        changed = []
+        for filename in filenames:
+            with open(os.path.join(self.datapath, filename), "rb") as stream:
+                file_hash = content_hash(stream.read())
+            file_entry = manifest["files"].get(filename)
+            if file_entry and file_entry["sha256"] == file_hash:
+                stats["skipped"] += sum(len(page["ids"]) for page in file_entry["pages"].values())
+            else:
+                changed.append((filename, file_hash))
+
+        if changed:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for filename, file_hash in changed:
+                    entry, embedded, skipped, deleted = self.ingest_file(filename, manifest["files"].get(filename), executor)
+                    entry["sha256"] = file_hash
+                    manifest["files"][filename] = entry
+                    # Saved after every file so an interrupted run does not embed the same pages again
+                    self.save_manifest(manifest)
+                    stats["embedded"] += embedded
+                    stats["skipped"] += skipped
+                    stats["deleted"] += deleted
+                    print(f"{filename}: embedded {embedded} chunks, skipped {skipped} unchanged chunks")
+
+        self.save_manifest(manifest)
+        if stats["embedded"] or stats["deleted"] or self.quantized_index is None:
+            self.export_quantized_index()
+        print(f"Ingestion took: {round(time.time() - start_time, 2)} seconds")
+        return stats
+
+    def export_quantized_index(self):
+        collection = self.vectorstore.get(include=["embeddings"])
+        vectors = collection["embeddings"]
+        if vectors is None or len(vectors) == 0:
+            self.quantized_index = None
+            return None
+        self.quantized_index = QuantizedIndex.build(collection["ids"], vectors, self.quantized_index_path)
+        print(f"Exported {len(self.quantized_index)} vectors to {self.quantized_index_path}")
+        return self.quantized_index
+
+    def lexical_search(self, query, k=20):
+        match = fts_query(query)
+        if not match or self.metadata_segment is None:
+            return []
+        rows = self.fts_connection.execute(
+            "SELECT e.embedding_id FROM embedding_fulltext_search f JOIN embeddings e ON e.id = f.rowid "
+            "WHERE embedding_fulltext_search MATCH ? AND e.segment_id = ? "
+            "ORDER BY bm25(embedding_fulltext_search) LIMIT ?",
+            (match, self.metadata_segment[0], k)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def vector_search(self, query, k=20, query_vector=None):
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        if self.quantized_index is not None:
+            return [chunk_id for chunk_id, _ in self.quantized_index.search(query_vector, k)]
+        result = self.vectorstore._collection.query(query_embeddings=[query_vector], n_results=k, include=[])
+        return result["ids"][0]
+
+    def hybrid_search(self, query, k=4, candidates=None, rerank=True):
+        candidates = candidates or self.params.get("retrieval_candidates", 20)
+        # The kNN query waits on the embedding request, so the FTS5 query runs alongside it.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            query_vector = executor.submit(self.embeddings.embed_query, query)
+            lexical_ids = self.lexical_search(query, candidates)
+            query_vector = query_vector.result()
+        ranked_ids = reciprocal_rank_fusion([lexical_ids, self.vector_search(query, candidates, query_vector)])
+        if not rerank:
+            ranked_ids = ranked_ids[:k]
+
+        if not ranked_ids:
+            return []
+        chunks = self.vectorstore.get(ids=ranked_ids, include=["documents", "metadatas", "embeddings"])
+        by_id = {
+            chunk_id: (Document(page_content=document, metadata=metadata or {}), embedding)
+            for chunk_id, document, metadata, embedding in zip(chunks["ids"], chunks["documents"], chunks["metadatas"], chunks["embeddings"])
+        }
+        ranked_ids = [chunk_id for chunk_id in ranked_ids if chunk_id in by_id]
+        ranked = [by_id[chunk_id] for chunk_id in ranked_ids]
+        if not rerank:
+            return [document for document, _ in ranked]
+        # The best full-text hits are kept whatever their embedding similarity; the query has no stopwords,
+        # so they match at least one content word of the question
+        top_lexical = set(lexical_ids[:self.params.get("lexical_keep", 2)])
+        return self.reranker.rerank(
+            query, query_vector, [document for document, _ in ranked], [embedding for _, embedding in ranked], k=k,
+            pinned={index for index, chunk_id in enumerate(ranked_ids) if chunk_id in top_lexical}
+        )
+
+    def search(self, query, k=4):
+        if self.count() == 0:
+            return "The renovation books are not indexed yet."
+        documents = self.hybrid_search(query, k=k)
+        return "\n\n".join(
+            f"[{os.path.basename(doc.metadata.get('source', ''))}, p. {doc.metadata.get('page', 0) + 1}]\n{doc.page_content}"
+            for doc in documents
+        )
+
+    def as_tool(self):
+        return Tool(
+            name="Renovation Books Search",
+            func=self.search,
+            description=(
+                "Search the home renovation and repair books for guidance on planning, techniques and safety. "
+                "The input is a short search query."
+            )
+        )
+
+
+if __name__ == "__main__":
+    # python -m src.knowledge_base [--rebuild] [--workers N]   (from the repository root)
+    from src.embedding_client import BatchedEmbeddings
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index the PDFs in the data folder into the Chroma store.")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and embed every page again")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to parse the PDFs (default: CPU count)")
+    args = parser.parse_args()
+
+    with open("config/credentials.yml", "r") as stream:
+        credentials = yaml.safe_load(stream)
+
+    embeddings = BatchedEmbeddings.from_credentials(credentials)
+    knowledge_base = KnowledgeBase(embeddings)
+    stats = knowledge_base.ingest(rebuild=args.rebuild, workers=args.workers)
+    print(
+        f"Embedded {stats['embedded']} chunks, skipped {stats['skipped']} unchanged chunks, "
+        f"deleted {stats['deleted']} chunks; {knowledge_base.count()} chunks in the collection"
+    )
+    print(f"Embedding requests: {embeddings.stats}")
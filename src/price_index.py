@@ -0,0 +1,208 @@
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from urllib.parse import quote_plus
+from src.response_cache import normalize_question
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+PRICE = re.compile(r"(\d{1,3}(?:[.\s]\d{3})*(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)\s*€")
+UNIT = re.compile(r"€\s*(?:/|por\s+|x\s+)\s*(m²|m2|m³|m3|ml|m|ud|u|unidad|kg|g|l|litro|pack|saco|rollo)\b", re.IGNORECASE)
+UNIT_NAMES = {'m2': 'm²', 'm3': 'm³', 'u': 'ud', 'unidad': 'ud', 'litro': 'l'}
+# Accent-free function words and question words left out of full-text queries (here and in the knowledge base)
+STOPWORDS = {
+    'para', 'con', 'sin', 'los', 'las', 'del', 'por', 'una', 'uno', 'unos', 'unas', 'que', 'como', 'cual', 'cuando',
+    'donde', 'cuanto', 'cuanta', 'mas', 'muy', 'esta', 'este', 'esto', 'hay', 'son', 'sus', 'mis', 'hago', 'hacer',
+    'puedo', 'quiero', 'tengo', 'necesito', 'amb', 'per', 'els', 'les', 'com', 'the', 'and', 'for', 'with', 'what',
+    'how', 'can', 'should', 'you', 'your', 'this', 'that', 'does', 'need', 'want', 'have', 'from'
+}
+
+
+def parse_number(number):
+    # "1.234,50" -> 1234.5, "1.000" -> 1000.0, "2.5" -> 2.5; Spanish text uses dots for thousands and a comma for decimals.
+    number = number.replace(" ", "").replace("\xa0", "")
+    if "," in number:
+        number = number.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", number):
+        number = number.replace(".", "")
+    return float(number)
+
+def parse_price(text):
+    # "1.234,50 €" -> 1234.5
+    match = PRICE.search(text.replace("\xa0", " "))
+    if match is None:
+        return None
+    return parse_number(match.group(1))
+
+def parse_unit(text):
+    match = UNIT.search(text.replace("\xa0", " "))
+    if match is None:
+        return "ud"
+    unit = match.group(1).lower()
+    return UNIT_NAMES.get(unit, unit)
+
+def stem(term):
+    # Drops a plural "s" and a final gender vowel, so "azulejos" and "blanca" match "azulejo" and "blanco".
+    if len(term) > 4 and term.endswith("s"):
+        term = term[:-1]
+    if len(term) > 4 and term[-1] in "aeo":
+        term = term[:-1]
+    return term
+
+def query_terms(query):
+    return {stem(term) for term in normalize_question(query).split() if len(term) >= 3 and term not in STOPWORDS}
+
+def fts_query(query, match_all=False):
+    # Prefix terms joined with OR, or with AND when every term must appear; accents are removed by the tokenizer.
+    operator = " AND " if match_all else " OR "
+    return operator.join(f'"{term}"*' for term in sorted(query_terms(query)))
+
+def title_matches(query, title):
+    # True when every term of the query starts a word of the title, as the AND query matches.
+    words = normalize_question(title).split()
+    return all(any(word.startswith(term) for word in words) for term in query_terms(query))
+
+async def scrape_products(page, url, timeout=8000):
+    # Shared by the crawler and the chatbot's store scraping; raises PlaywrightTimeoutError when no product shows up.
+    await page.goto(url, wait_until="domcontentloaded")
+    await page.wait_for_selector(".product-title", timeout=timeout)
+    titles = await page.locator(".product-title").all_inner_texts()
+    prices = await page.locator(".product-price").all_inner_texts()
+    return [{"title": " ".join(title.split()), "price": price} for title, price in zip(titles, prices)]
+
+
+class PriceIndex:
+    """Local SQLite index of store products, searched with FTS5.
+
+    Filled ahead of time by the crawler (``python -m src.price_index``), so
+    the cost agent looks prices up in milliseconds instead of opening the
+    stores' pages during a request.
+    """
+
+    def __init__(self, path="db/price_index.sqlite3"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "id INTEGER PRIMARY KEY, store TEXT NOT NULL, title TEXT NOT NULL, price REAL NOT NULL, "
+            "unit TEXT NOT NULL, url TEXT, updated_at REAL NOT NULL, UNIQUE (store, title));"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+            "title, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2');"
+            "CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN "
+            "INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title); END;"
+            "CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN "
+            "INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title); END;"
+            "CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN "
+            "INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+            "INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title); END;"
+        )
+        self.connection.commit()
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def upsert(self, store, products, url=None):
+        # Products without a readable price are skipped; returns the number stored.
+        rows = []
+        now = time.time()
+        for product in products:
+            price = parse_price(product["price"])
+            if price is not None and product["title"]:
+                rows.append((store, product["title"], price, parse_unit(product["price"]), url, now))
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO products (store, title, price, unit, url, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (store, title) DO UPDATE SET "
+                "price = excluded.price, unit = excluded.unit, url = excluded.url, updated_at = excluded.updated_at",
+                rows
+            )
+            self.connection.commit()
+        return len(rows)
+
+    def prune(self, max_age):
+        with self.lock:
+            deleted = self.connection.execute("DELETE FROM products WHERE updated_at < ?", (time.time() - max_age,)).rowcount
+            self.connection.commit()
+        return deleted
+
+    def search(self, query, limit=10, match_all=False):
+        match = fts_query(query, match_all)
+        if not match:
+            return []
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT p.store, p.title, p.price, p.unit, p.url, p.updated_at FROM products_fts f "
+                "JOIN products p ON p.id = f.rowid WHERE products_fts MATCH ? "
+                "ORDER BY bm25(products_fts) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        return [
+            {"store": store, "title": title, "price": price, "unit": unit, "url": url, "updated_at": updated_at}
+            for store, title, price, unit, url, updated_at in rows
+        ]
+
+    def search_text(self, query, limit=10):
+        results = self.search(query, limit)
+        if not results:
+            return f"No indexed store prices match '{query}'."
+        return "\n".join(
+            f"- {result['store']}: {result['title']} — {result['price']:.2f} € / {result['unit']} "
+            f"(checked {time.strftime('%Y-%m-%d', time.localtime(result['updated_at']))})"
+            for result in results
+        )
+
+
+def crawl(price_index, pool, stores, queries, timeout=8000):
+    """Scrapes every store once per query (or its listed page when it has no ``search`` template) into the index."""
+    jobs = []
+    for store in stores:
+        if not store.get("search"):
+            print(f"{store['name']} has no `search` template: only {store['link']} is scraped and the queries are not used")
+        urls = [store["search"].format(query=quote_plus(query)) for query in queries] if store.get("search") else [store["link"]]
+        for url in urls:
+            jobs.append((store["name"], url, pool.submit(lambda page, url=url: scrape_products(page, url, timeout))))
+
+    stored = 0
+    for store_name, url, future in jobs:
+        try:
+            stored += price_index.upsert(store_name, future.result(), url)
+        except PlaywrightTimeoutError:
+            print(f"{store_name}: {url} failed: no products after {timeout / 1000:g} seconds")
+        except Exception as e:
+            print(f"{store_name}: {url} failed: {e}")
+    return stored
+
+
+if __name__ == "__main__":
+    # python -m src.price_index [--every HOURS]   (from the repository root)
+    from src.browser_pool import BrowserPool
+    import argparse
+    import yaml
+
+    parser = argparse.ArgumentParser(description="Crawl the stores in cost&contractors.yaml into the local price index.")
+    parser.add_argument("--every", type=float, default=None, help="keep running and crawl again every HOURS")
+    args = parser.parse_args()
+
+    with open("data/sites/cost&contractors.yaml", "r") as stream:
+        sites = yaml.safe_load(stream)
+    settings = sites.get("price_index", {})
+    price_index = PriceIndex()
+    pool = BrowserPool(size=2, max_pages=6)
+
+    while True:
+        start_time = time.time()
+        stored = crawl(price_index, pool, sites.get("Stores", []), settings.get("queries", []))
+        pruned = price_index.prune(settings.get("max_age", 30 * 24 * 3600))
+        print(
+            f"Stored {stored} products, pruned {pruned} outdated ones; {price_index.count()} products in the index "
+            f"({round(time.time() - start_time, 2)} seconds)"
+        )
+        if args.every is None:
+            break
+        time.sleep(args.every * 3600)
+    pool.close()
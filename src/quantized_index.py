@@ -0,0 +1,69 @@
+import json
+import os
+
+import numpy as np
+
+
+class QuantizedIndex:
+    """Read-only int8 vector index opened with mmap.
+
+    Vectors are L2-normalized and scalar-quantized per dimension to int8
+    (a quarter of the float32 size). The codes are memory-mapped, so every
+    Streamlit session or worker process opening the same files shares the
+    page cache instead of holding its own float32 copy. Scores approximate
+    cosine similarity.
+    """
+
+    CODES_FILE = "codes.int8.npy"
+    SCALE_FILE = "scale.npy"
+    IDS_FILE = "ids.json"
+
+    def __init__(self, path, block_size=1024):
+        self.path = path
+        self.block_size = block_size
+        self.codes = np.load(os.path.join(path, self.CODES_FILE), mmap_mode="r")
+        self.scale = np.load(os.path.join(path, self.SCALE_FILE))
+        with open(os.path.join(path, self.IDS_FILE), "r") as stream:
+            self.ids = json.load(stream)
+
+    @classmethod
+    def exists(cls, path):
+        return all(os.path.exists(os.path.join(path, name)) for name in (cls.CODES_FILE, cls.SCALE_FILE, cls.IDS_FILE))
+
+    @classmethod
+    def build(cls, ids, vectors, path):
+        os.makedirs(path, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scale = np.maximum(np.abs(vectors).max(axis=0), 1e-12) / 127.0
+        codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+        # Written under temporary names first so readers never open a half-written index
+        for name, array in ((cls.CODES_FILE, codes), (cls.SCALE_FILE, scale.astype(np.float32))):
+            with open(os.path.join(path, name + ".tmp"), "wb") as stream:
+                np.save(stream, array)
+        with open(os.path.join(path, cls.IDS_FILE + ".tmp"), "w") as stream:
+            json.dump(list(ids), stream)
+        for name in (cls.CODES_FILE, cls.SCALE_FILE, cls.IDS_FILE):
+            os.replace(os.path.join(path, name + ".tmp"), os.path.join(path, name))
+        return cls(path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_vector, k=20):
+        if len(self.ids) == 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        # The per-dimension scale is folded into the query, so the codes are only widened block by block.
+        scaled_query = query * self.scale
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), self.block_size):
+            block = self.codes[start:start + self.block_size]
+            scores[start:start + len(block)] = block.astype(np.float32) @ scaled_query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
@@ -0,0 +1,90 @@
+import re
+
+from src.response_cache import normalize_question
+from src.response_template import detect_language
+
+
+NOT_RELATED = 'not_related'
+RELATED = 'related'
+AMBIGUOUS = 'ambiguous'
+
+# Word stems, matched against the start of each normalized word (accents removed).
+# Home-improvement work, materials and building elements; a RELATED decision needs at least one of them.
+PROJECT_STEMS = (
+    # es / ca
+    'reform', 'obra', 'pint', 'pared', 'paret', 'suelo', 'terra', 'techo', 'sostre', 'bano', 'cocina', 'cuina',
+    'azulej', 'baldos', 'ceram', 'parquet', 'tarima', 'laminad', 'yeso', 'pladur', 'escayol', 'tabique', 'ladrill',
+    'cemento', 'mortero', 'hormig', 'enluc', 'alicat', 'silicon', 'fontan', 'tuberi', 'grifo', 'desag', 'humedad',
+    'gotera', 'electric', 'enchuf', 'interrupt', 'cablea', 'ventana', 'finestra', 'puerta', 'porta', 'persian',
+    'armario', 'estanteri', 'balda', 'terraza', 'tejado', 'fachada', 'aislam', 'calefacc', 'radiador', 'caldera',
+    'barniz', 'lijar', 'taladr', 'atornill', 'banera', 'ducha', 'inodoro', 'masilla', 'termostat', 'climatiz',
+    # en
+    'renovat', 'remodel', 'paint', 'wall', 'floor', 'ceiling', 'bathroom', 'kitchen', 'tile', 'tiling', 'plaster',
+    'drywall', 'brick', 'concrete', 'grout', 'caulk', 'plumb', 'pipe', 'faucet', 'leak', 'damp', 'wiring',
+    'outlet', 'socket', 'switch', 'window', 'door', 'shelf', 'shelv', 'cabinet', 'roof', 'insulat', 'heating',
+    'boiler', 'varnish', 'sanding', 'sandpaper', 'drill', 'bathtub', 'shower', 'toilet', 'thermostat'
+)
+
+# Generic verbs and places: they support a home-improvement reading ("cambiar la rueda de la bici" uses them too)
+# but never decide it alone.
+GENERIC_STEMS = (
+    'montar', 'instal', 'repar', 'arregl', 'cambiar', 'sustitu', 'renov', 'habitacion', 'dormitorio', 'salon',
+    'pasillo', 'vivienda', 'piso', 'casa', 'hogar',
+    'install', 'repair', 'fix', 'replace', 'bedroom', 'room', 'house', 'home', 'diy'
+)
+
+# Only words that rarely appear in a home-improvement question: "tiempo" (drying time), "programa" (a thermostat),
+# "historia", "bolsa", "film", "code" (building code), "clima"/"medic" ("climatización", "medición") are left out.
+OFF_TOPIC_STEMS = (
+    'receta', 'recipe', 'cocinar', 'futbol', 'football', 'soccer', 'partido', 'pelicula', 'movie', 'cancion',
+    'song', 'musica', 'music', 'chiste', 'joke', 'poema', 'poem', 'capital', 'presidente', 'president', 'eleccion',
+    'election', 'bitcoin', 'python', 'javascript', 'horoscop', 'weather', 'vuelo', 'flight', 'hotel',
+    'restaurante', 'restaurant', 'guerra', 'medico', 'medicina', 'doctor', 'dieta', 'diet'
+)
+
+MEASUREMENT = re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:m2|m²|m3|metros?|meters?|metres?|cm|mm|m|ft|feet|sq|pies)\b")
+BUDGET = re.compile(r"(?:€|\$|£|\beur(?:os?)?\b|\bpresupuesto\b|\bbudget\b|\bpressupost\b)")
+LOCATION = re.compile(r"\b(?:en|in|a|desde|near|cerca de)\s+[A-ZÁÉÍÓÚÑ][\wáéíóúñ]+")
+
+REDIRECTIONS = {
+    'es': "Solo puedo ayudarte con proyectos de reformas, reparaciones y mejoras del hogar. "
+          "¿Tienes algún trabajo en casa en el que pueda echarte una mano?",
+    'ca': "Només et puc ajudar amb projectes de reformes, reparacions i millores de la llar. "
+          "Tens alguna feina a casa en què et pugui donar un cop de mà?",
+    'en': "I can only help with home improvement, repair and renovation projects. "
+          "Is there any work around the house I can help you plan?"
+}
+
+
+def count_stems(words, stems):
+    return sum(1 for word in words if word.startswith(stems))
+
+class RelevancePreClassifier:
+    """CPU-only keyword classifier run before the relevance agent.
+
+    Only clear cases are decided locally: no home-improvement vocabulary plus at
+    least two off-topic words is NOT_RELATED, and a home-improvement project
+    (naming the work, a material or a building element, not just a generic verb)
+    that already states measurements and a location or budget is RELATED. Everything
+    else is AMBIGUOUS and goes to the relevance agent.
+    """
+
+    def classify(self, question, project_description=None):
+        project_description = project_description or question
+        question_words = normalize_question(question).split()
+        project_words = normalize_question(project_description).split()
+
+        project_hits = count_stems(project_words, PROJECT_STEMS)
+        domain_hits = project_hits + count_stems(project_words, GENERIC_STEMS)
+        off_topic_hits = count_stems(question_words, OFF_TOPIC_STEMS)
+
+        # One off-topic word is not enough: DIY questions mention "tiempo", "music" or "hotel" too
+        if domain_hits == 0 and off_topic_hits >= 2:
+            return NOT_RELATED
+        if project_hits >= 1 and domain_hits >= 2 and off_topic_hits == 0 and MEASUREMENT.search(project_description.lower()):
+            if LOCATION.search(project_description) or BUDGET.search(project_description.lower()):
+                return RELATED
+        return AMBIGUOUS
+
+    def redirection(self, question):
+        return REDIRECTIONS.get(detect_language(question), REDIRECTIONS['en'])
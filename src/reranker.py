@@ -0,0 +1,102 @@
+from langchain_core.documents import Document
+
+import numpy as np
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+
+def overlap_length(previous, text, min_overlap=30, max_overlap=400):
+    # Length of the longest suffix of ``previous`` that is also a prefix of ``text``.
+    for length in range(min(len(previous), len(text), max_overlap), min_overlap - 1, -1):
+        if previous.endswith(text[:length]):
+            return length
+    return 0
+
+def shingles(text, size=5):
+    words = text.lower().split()
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+def remove_overlaps(documents, max_overlap=400, duplicate_threshold=0.8, min_length=100):
+    """Returns ``(index, document)`` for the chunks worth keeping, in the given order.
+
+    Consecutive chunks of a page share up to ``chunk_overlap`` characters, so
+    the text a chunk shares with a chunk of the same page already kept is cut
+    off. Chunks left shorter than ``min_length`` characters, or whose word
+    shingles mostly repeat a kept chunk, are dropped.
+    """
+    kept = []
+    kept_shingles = []
+    for index, document in enumerate(documents):
+        text = document.page_content
+        location = (document.metadata.get("source"), document.metadata.get("page"))
+        for _, other in kept:
+            if (other.metadata.get("source"), other.metadata.get("page")) != location:
+                continue
+            text = text[overlap_length(other.page_content, text, max_overlap=max_overlap):]
+            text = text[:len(text) - overlap_length(text, other.page_content, max_overlap=max_overlap)]
+        text = text.strip()
+        if len(text) < min_length:
+            continue
+
+        text_shingles = shingles(text)
+        if any(len(text_shingles & other) / len(text_shingles | other) >= duplicate_threshold for other in kept_shingles):
+            continue
+        kept.append((index, Document(page_content=text, metadata=document.metadata)))
+        kept_shingles.append(text_shingles)
+    return kept
+
+def maximal_marginal_relevance(relevance, vectors, k, lambda_mult=0.5, selected=None):
+    # Greedy MMR over L2-normalized ``vectors``; ``relevance`` may come from the embeddings or a cross-encoder.
+    # ``selected`` are indices picked before MMR starts.
+    similarity = vectors @ vectors.T
+    selected = list(selected or [])[:k] or [int(np.argmax(relevance))]
+    while len(selected) < min(k, len(relevance)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * similarity[:, selected].max(axis=1)
+        scores[selected] = -np.inf
+        selected.append(int(np.argmax(scores)))
+    return selected
+
+
+class Reranker:
+    """Post-retrieval stage that turns the fused candidates into the few chunks sent to the agents.
+
+    Overlapping and duplicated text is removed first, then maximal marginal
+    relevance picks ``k`` chunks that are relevant but not redundant. The
+    ``pinned`` chunks (the best full-text hits) are always kept, so a chunk found
+    by its exact terms is not lost to a weak embedding similarity. With a
+    ``model_name`` and sentence-transformers installed, a local CPU
+    cross-encoder scores the relevance instead of the embedding similarity.
+    """
+
+    def __init__(self, model_name=None, lambda_mult=0.5, max_overlap=400):
+        self.lambda_mult = lambda_mult
+        self.max_overlap = max_overlap
+        self.cross_encoder = None
+        if model_name:
+            if CrossEncoder is None:
+                print(f"sentence-transformers is not installed, reranking without {model_name}")
+            else:
+                self.cross_encoder = CrossEncoder(model_name, device="cpu")
+
+    def relevance(self, query, query_vector, documents, vectors):
+        if self.cross_encoder is not None:
+            scores = self.cross_encoder.predict([(query, document.page_content) for document in documents])
+            return 1.0 / (1.0 + np.exp(-np.asarray(scores, dtype=np.float32)))
+        return vectors @ query_vector
+
+    def rerank(self, query, query_vector, documents, vectors, k=4, pinned=()):
+        kept = remove_overlaps(documents, max_overlap=self.max_overlap)
+        if not kept:
+            return []
+        vectors = np.asarray([vectors[index] for index, _ in kept], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+        documents = [document for _, document in kept]
+        relevance = self.relevance(query, query_vector, documents, vectors)
+        selected = [position for position, (index, _) in enumerate(kept) if index in pinned]
+        return [documents[i] for i in maximal_marginal_relevance(relevance, vectors, k, self.lambda_mult, selected)]
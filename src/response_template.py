@@ -0,0 +1,50 @@
+from ftlangdetect import detect
+from src.specialist_outputs import render_section
+
+
+HEADINGS = {
+    'es': {
+        'title': 'Plan de tu proyecto',
+        'schedule': 'Planificación y guía paso a paso',
+        'materials': 'Materiales',
+        'cost_estimation': 'Estimación de costes',
+        'tools': 'Herramientas',
+        'contractors': 'Profesionales recomendados',
+        'safety_guidance': 'Notas de seguridad'
+    },
+    'en': {
+        'title': 'Your project plan',
+        'schedule': 'Schedule and step-by-step guide',
+        'materials': 'Materials',
+        'cost_estimation': 'Cost estimation',
+        'tools': 'Tools',
+        'contractors': 'Recommended contractors',
+        'safety_guidance': 'Safety notes'
+    }
+}
+
+LANGUAGE_NAMES = {
+    'es': 'Spanish',
+    'en': 'English',
+    'ca': 'Catalan',
+    'fr': 'French',
+    'pt': 'Portuguese',
+    'it': 'Italian',
+    'de': 'German'
+}
+
+SECTION_ORDER = ('schedule', 'materials', 'cost_estimation', 'tools', 'contractors', 'safety_guidance')
+
+
+def detect_language(text):
+    # fastText rejects newlines, and only the first part of a long answer is needed to tell the language.
+    return detect(text=" ".join(text.split())[:1000], low_memory=False)["lang"]
+
+def render_response(context, language):
+    headings = HEADINGS.get(language, HEADINGS['en'])
+    sections = [f"# {headings['title']}"]
+    for context_key in SECTION_ORDER:
+        content = context.get(context_key)
+        if content:
+            sections.append(f"## {headings[context_key]}\n\n{render_section(context_key, content, language).strip()}")
+    return "\n\n".join(sections)
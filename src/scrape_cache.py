@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+from src.response_cache import SQLiteCacheBackend, normalize_question
+
+import threading
+import time
+
+
+# Seconds a scraped page is fresh (`ttl`) and how long a stale copy may still be served (`max_stale`),
+# unless the `cache` section of data/sites/cost&contractors.yaml sets them.
+DEFAULT_TTLS = {
+    'Stores': {'ttl': 12 * 3600, 'max_stale': 7 * 24 * 3600},
+    'Contractors': {'ttl': 7 * 24 * 3600, 'max_stale': 30 * 24 * 3600}
+}
+
+
+class ScrapeCache:
+    """Persistent cache of ``scrape_pages`` results, keyed by section, site and query.
+
+    A fresh entry is returned as is. A stale one (older than the section's
+    ``ttl`` but younger than ``max_stale``) is returned too, while a refresh
+    runs in the background; only misses wait for the browser. Concurrent
+    requests for the same page share one scrape, and results with an
+    ``error`` are never stored.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else SQLiteCacheBackend(path="db/scrape_cache.sqlite3")
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "misses": 0}
+
+    def make_key(self, section_type, site, query):
+        return f"scrape:{section_type}:{site}:{normalize_question(query or '')}"
+
+    def get(self, section_type, site, query, fetch, ttls=None):
+        """Returns a ``Future`` with the cached or scraped result.
+
+        ``fetch()`` starts a scrape and returns its ``Future``; ``ttls`` is the
+        ``cache`` section of the sites file and overrides ``DEFAULT_TTLS``.
+        """
+        settings = {**DEFAULT_TTLS.get(section_type, DEFAULT_TTLS['Stores']), **((ttls or {}).get(section_type) or {})}
+        key = self.make_key(section_type, site, query)
+        entry = self.backend.get(key)
+        if entry is None:
+            with self.lock:
+                self.stats["misses"] += 1
+            return self.refresh(key, fetch, settings["max_stale"])
+
+        stale = time.time() - entry["fetched_at"] > settings["ttl"]
+        with self.lock:
+            self.stats["stale" if stale else "fresh"] += 1
+        if stale:
+            self.refresh(key, fetch, settings["max_stale"])
+        future = Future()
+        future.set_result(entry["value"])
+        return future
+
+    def refresh(self, key, fetch, max_stale):
+        with self.lock:
+            if key in self.in_flight:
+                return self.in_flight[key]
+            future = fetch()
+            self.in_flight[key] = future
+        future.add_done_callback(lambda done: self.store(key, done, max_stale))
+        return future
+
+    def store(self, key, future, max_stale):
+        with self.lock:
+            self.in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        value = future.result()
+        if isinstance(value, dict) and "error" in value:
+            return
+        self.backend.set(key, {"value": value, "fetched_at": time.time()}, max_stale)
@@ -0,0 +1,89 @@
+from concurrent.futures import Future
+from langchain.tools import Tool
+from src.response_cache import InMemoryCacheBackend, normalize_question
+
+import threading
+import time
+
+
+NO_RESULTS = "No good DuckDuckGo Search Result was found"
+
+
+def normalize_query(query):
+    # Case, accents, punctuation, word order and repeated words do not change the key.
+    return " ".join(sorted(set(normalize_question(str(query)).split())))
+
+
+class SearchCache:
+    """Memoizing wrapper around the shared ``DuckDuckGoSearchRun`` tool.
+
+    Results are kept for ``ttl`` seconds in an LRU ``InMemoryCacheBackend``
+    under the normalized query. When several agents search the same query at
+    the same time, one search runs and the others wait for its result. Errors
+    and empty results are not cached.
+    """
+
+    def __init__(self, search_tool, backend=None, ttl=6 * 3600):
+        self.search_tool = search_tool
+        self.backend = backend if backend is not None else InMemoryCacheBackend(max_entries=512)
+        self.ttl = ttl
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.stats = self.empty_stats()
+        self.request_stats = self.empty_stats()
+
+    def empty_stats(self):
+        return {"searches": 0, "hits": 0, "coalesced": 0, "misses": 0, "errors": 0, "saved_seconds": 0.0}
+
+    def reset_request_stats(self):
+        with self.lock:
+            self.request_stats = self.empty_stats()
+
+    def count(self, outcome, saved_seconds=0.0):
+        with self.lock:
+            for stats in (self.stats, self.request_stats):
+                stats["searches"] += 1
+                stats[outcome] += 1
+                stats["saved_seconds"] = round(stats["saved_seconds"] + saved_seconds, 2)
+
+    def run(self, query):
+        key = normalize_query(query)
+        with self.lock:
+            # Looked up under the lock, so a search finishing meanwhile cannot be started again
+            entry = self.backend.get(key)
+            future = self.in_flight.get(key)
+            leader = future is None and entry is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+
+        if entry is not None:
+            self.count("hits", entry["seconds"])
+            return entry["value"]
+        if not leader:
+            start_time = time.time()
+            value, seconds = future.result()
+            self.count("coalesced", max(seconds - (time.time() - start_time), 0.0))
+            return value
+
+        start_time = time.time()
+        try:
+            value = self.search_tool.run(query)
+        except Exception as e:
+            future.set_exception(e)
+            self.count("errors")
+            raise
+        else:
+            seconds = time.time() - start_time
+            if value and not value.startswith(NO_RESULTS):
+                self.backend.set(key, {"value": value, "seconds": seconds}, self.ttl)
+            future.set_result((value, seconds))
+            self.count("misses")
+            return value
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def as_tool(self):
+        # Same name and description as the wrapped tool, so the agents' prompts do not change.
+        return Tool(name=self.search_tool.name, func=self.run, description=self.search_tool.description)
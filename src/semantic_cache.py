@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+import re
+import threading
+
+
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def numbers_key(text):
+    # "12 m2, 2,5 m de alto" -> "12|2|2,5": answers are only reused for the same dimensions, quantities and budget.
+    return "|".join(NUMBER.findall(text))
+
+
+class SemanticCache:
+    """Reuses agent answers for project descriptions that mean the same thing.
+
+    Each namespace (a context key such as ``materials``) keeps its own FAISS
+    inner-product index over L2-normalized embeddings, so scores are cosine
+    similarities and an answer is reused when the best score reaches ``threshold``.
+    Embeddings barely tell "12 m2" from "40 m2", so the numbers in the text are
+    part of the namespace and must match exactly.
+    """
+
+    def __init__(self, embeddings, threshold=0.92):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.indexes = {}
+        self.answers = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.vectors = OrderedDict()
+        self.embed_lock = threading.Lock()
+
+    def embed(self, text, max_vectors=128):
+        # Agents of one request embed the same description concurrently; the lock makes them share one call.
+        with self.embed_lock:
+            vector = self.vectors.get(text)
+            if vector is None:
+                vector = np.asarray(self.embeddings.embed_query(text), dtype="float32").reshape(1, -1)
+                faiss.normalize_L2(vector)
+                self.vectors[text] = vector
+                if len(self.vectors) > max_vectors:
+                    self.vectors.popitem(last=False)
+            return vector
+
+    def try_embed(self, text):
+        # The cache is an optimization: an unreachable embedding endpoint only turns lookups into misses.
+        try:
+            return self.embed(text)
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+            print(f"Semantic cache skipped, embedding failed: {e}")
+            return None
+
+    def lookup(self, namespace, text):
+        namespace = f"{namespace}:{numbers_key(text)}"
+        vector = self.try_embed(text)
+        with self.lock:
+            index = self.indexes.get(namespace)
+            if vector is None or index is None or index.ntotal == 0:
+                self.misses += 1
+                return None, 0.0
+            scores, ids = index.search(vector, 1)
+            score = float(scores[0][0])
+            if score < self.threshold:
+                self.misses += 1
+                return None, score
+            self.hits += 1
+            return self.answers[namespace][ids[0][0]], score
+
+    def add(self, namespace, text, answer):
+        namespace = f"{namespace}:{numbers_key(text)}"
+        vector = self.try_embed(text)
+        if vector is None:
+            return
+        with self.lock:
+            if namespace not in self.indexes:
+                self.indexes[namespace] = faiss.IndexFlatIP(vector.shape[1])
+                self.answers[namespace] = []
+            self.indexes[namespace].add(vector)
+            self.answers[namespace].append(answer)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "entries": {namespace: index.ntotal for namespace, index in self.indexes.items()}
+        }
@@ -0,0 +1,173 @@
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional
+from src.cost_calculator import format_quantity
+
+import json
+import re
+
+
+LABELS = {
+    'es': {
+        'alternative': 'Alternativa', 'contact': 'Contacto', 'website': 'Web', 'budget': 'Presupuesto',
+        'task': 'Tarea', 'duration': 'Duración', 'people': 'Personas', 'schedule': 'Planificación',
+        'guide': 'Guía paso a paso', 'risks': 'Riesgos', 'precautions': 'Precauciones',
+        'extra_caution': 'Extrema la precaución'
+    },
+    'en': {
+        'alternative': 'Alternative', 'contact': 'Contact', 'website': 'Website', 'budget': 'Budget',
+        'task': 'Task', 'duration': 'Duration', 'people': 'Recommended people', 'schedule': 'Schedule',
+        'guide': 'Step-by-step guide', 'risks': 'Risks', 'precautions': 'Precautions',
+        'extra_caution': 'Extra caution'
+    }
+}
+
+
+class Material(BaseModel):
+    name: str
+    quantity: float
+    unit: str = Field(description="kg, l, m², m, m³ or ud")
+    notes: Optional[str] = None
+
+class MaterialsList(BaseModel):
+    items: List[Material]
+
+    def to_markdown(self, labels):
+        return "\n".join(
+            f"- **{item.name}**: {format_quantity(item.quantity, item.unit)}" + (f" ({item.notes})" if item.notes else "")
+            for item in self.items
+        )
+
+class ToolItem(BaseModel):
+    name: str
+    quantity: int = 1
+    alternative: Optional[str] = None
+
+class ToolList(BaseModel):
+    tools: List[ToolItem]
+
+    def to_markdown(self, labels):
+        lines = []
+        for tool in self.tools:
+            lines.append(f"- **{tool.name}**" + (f" × {tool.quantity}" if tool.quantity > 1 else ""))
+            if tool.alternative:
+                lines.append(f"  - {labels['alternative']}: {tool.alternative}")
+        return "\n".join(lines)
+
+class Contractor(BaseModel):
+    name: str
+    contact: Optional[str] = None
+    website: Optional[str] = None
+    budget_request: Optional[str] = Field(default=None, description="how to request a budget")
+
+class ContractorList(BaseModel):
+    contractors: List[Contractor]
+
+    def to_markdown(self, labels):
+        lines = []
+        for contractor in self.contractors:
+            lines.append(f"- **{contractor.name}**")
+            if contractor.contact:
+                lines.append(f"  - {labels['contact']}: {contractor.contact}")
+            if contractor.website:
+                lines.append(f"  - {labels['website']}: {contractor.website}")
+            if contractor.budget_request:
+                lines.append(f"  - {labels['budget']}: {contractor.budget_request}")
+        return "\n".join(lines)
+
+class ScheduledTask(BaseModel):
+    task: str
+    duration: str
+    people: Optional[int] = None
+
+class GuidePhase(BaseModel):
+    phase: str
+    steps: List[str]
+
+class ProjectSchedule(BaseModel):
+    tasks: List[ScheduledTask]
+    guide: List[GuidePhase]
+
+    def to_markdown(self, labels):
+        lines = [
+            f"### {labels['schedule']}",
+            f"| {labels['task']} | {labels['duration']} | {labels['people']} |",
+            "|---|---|---|"
+        ]
+        lines.extend(f"| {task.task} | {task.duration} | {task.people or ''} |" for task in self.tasks)
+        lines.append(f"\n### {labels['guide']}")
+        for number, phase in enumerate(self.guide, start=1):
+            lines.append(f"{number}. {phase.phase}")
+            lines.extend(f"   - {step}" for step in phase.steps)
+        return "\n".join(lines)
+
+class SafetyStep(BaseModel):
+    step: str
+    risks: List[str] = []
+    precautions: List[str] = []
+
+class SafetyGuide(BaseModel):
+    steps: List[SafetyStep]
+    extra_caution: List[str] = []
+
+    def to_markdown(self, labels):
+        lines = []
+        for number, step in enumerate(self.steps, start=1):
+            lines.append(f"{number}. **{step.step}**")
+            if step.risks:
+                lines.append(f"   - {labels['risks']}: {'; '.join(step.risks)}")
+            if step.precautions:
+                lines.append(f"   - {labels['precautions']}: {'; '.join(step.precautions)}")
+        if self.extra_caution:
+            lines.append(f"\n**{labels['extra_caution']}:** {'; '.join(self.extra_caution)}")
+        return "\n".join(lines)
+
+
+SCHEMAS = {
+    'materials': MaterialsList,
+    'tools': ToolList,
+    'contractors': ContractorList,
+    'schedule': ProjectSchedule,
+    'safety_guidance': SafetyGuide
+}
+
+# Short examples shown to the agents instead of the full JSON schemas, which cost several times more tokens.
+EXAMPLES = {
+    'materials': {"items": [{"name": "Plastic paint (white)", "quantity": 15, "unit": "l", "notes": "two coats"}]},
+    'tools': {"tools": [{"name": "Paint roller", "quantity": 2, "alternative": "Wide brush"}]},
+    'contractors': {"contractors": [{"name": "ABC Renovations", "contact": "+34 600 000 000", "website": "https://abc.example",
+                                     "budget_request": "Contact form on the website"}]},
+    'schedule': {"tasks": [{"task": "Prepare the walls", "duration": "1 day", "people": 1}],
+                 "guide": [{"phase": "Preparation", "steps": ["Protect the floor", "Fill the cracks"]}]},
+    'safety_guidance': {"steps": [{"step": "Sanding", "risks": ["Dust"], "precautions": ["FFP2 mask", "Goggles"]}],
+                        "extra_caution": ["Ventilate the room while painting"]}
+}
+
+
+def schema_instructions(context_key):
+    example = json.dumps(EXAMPLES[context_key], ensure_ascii=False)
+    return (
+        "Answer ONLY with one JSON object, without markdown or any other text, with exactly the same keys and "
+        f"value types as this example: {example}\n"
+        "Write the values in the user's language. Quantities are plain numbers."
+    )
+
+def parse_output(context_key, text):
+    # The validated object as a plain dict, or None when the answer is not valid JSON for the schema.
+    match = re.search(r"\{.*\}", str(text), re.DOTALL)
+    if match is None:
+        return None
+    try:
+        return SCHEMAS[context_key].model_validate_json(match.group(0)).model_dump(exclude_none=True)
+    except ValidationError:
+        return None
+
+def render_section(context_key, value, language='en'):
+    if isinstance(value, dict) and context_key in SCHEMAS:
+        return SCHEMAS[context_key].model_validate(value).to_markdown(LABELS.get(language, LABELS['en']))
+    return str(value)
+
+def prompt_value(value):
+    # Structured results go into prompts as compact JSON instead of markdown.
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value